@@ -1,19 +1,29 @@
 import os
 import sys
+import atexit
 import tempfile
-import shutil
 import pickle
 from pathlib import Path
 from datetime import datetime, timedelta
 import threading
+from functools import wraps
+import time
 import json
+import gzip
+import operator
 
+import numpy as np
 import pandas as pd
-from flask import Flask, request, jsonify
+try:
+    import brotli  # optional: br is preferred over gzip when installed
+except ImportError:
+    brotli = None
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 from flask_jwt_extended import (
-    JWTManager, jwt_required, get_jwt_identity
+    JWTManager, jwt_required, get_jwt_identity, verify_jwt_in_request
 )
 
 # Ensure package imports work
@@ -32,16 +42,27 @@ else:
 
 # Local imports
 from config import Config
-from models.user_model import mongo
+from models.user_model import mongo, User
 from routes.auth_routes import auth_bp
+from services.drift_monitor import DriftMonitor
+from services.shadow import ShadowEvaluator
+from services.admission import AdmissionController, queue_age_s
+from services.rollups import record_loan, read_rollups, rebuild_rollups, normalize_created_at
+from services.artifact_store import ArtifactStore
+from services.etags import bump, versions, make_etag, user_loans_scope, GLOBAL_LOANS_SCOPE
 
 # -------------------------------
 # Paths & Constants
 # -------------------------------
 MODEL_PATH = ROOT_DIR / "Backend" / "model" / "loan_pipeline.pkl"
-BACKUP_DIR = ROOT_DIR / "Backend" / "model" / "backups"
+ARTIFACT_DIR = ROOT_DIR / "Backend" / "model" / "artifacts"
+LEGACY_BACKUP_DIR = ROOT_DIR / "Backend" / "model" / "backups"   # pre-artifact-store copies
 META_PATH = ROOT_DIR / "Backend" / "model" / "loan_pipeline_meta.json"
-BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+CANDIDATE_PATH = ROOT_DIR / "Backend" / "model" / "loan_pipeline_candidate.pkl"
+CANDIDATE_META_PATH = ROOT_DIR / "Backend" / "model" / "loan_pipeline_candidate_meta.json"
+SHADOW_CONFIG_PATH = ROOT_DIR / "Backend" / "model" / "shadow_config.json"
+WORKER_SYNC_INTERVAL_S = float(os.environ.get("WORKER_SYNC_INTERVAL_S", 2.0))
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 1))  # Render: one proxy in front
 
 EXPECTED_FEATURES = [
     "no_of_dependents", "education", "self_employed",
@@ -55,6 +76,10 @@ EXPECTED_FEATURES = [
 # -------------------------------
 model_lock = threading.Lock()
 app = Flask(__name__)
+# Only trust X-Forwarded-For entries added by our own proxies; request.remote_addr
+# is then the real client address (used for per-IP rate limits)
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS)
 
 # CORS
 # raw_origins = os.environ.get("ALLOWED_ORIGINS", "").strip()
@@ -120,6 +145,107 @@ def _expired_token(jwt_header, jwt_data):
 def _needs_fresh(jwt_header, jwt_data):
     return jsonify({"error": "Fresh token required"}), 401
 
+# -------------------------------
+# Admission control (per-route concurrency, load shedding, rate limits)
+# -------------------------------
+admission = AdmissionController() if os.environ.get("ADMISSION_CONTROL", "1") != "0" else None
+
+def _admission_pool(path):
+    if path in ("/predict", "/api/predict") or path.startswith("/api/predict/"):
+        return "predict"
+    if path.startswith("/api/auth/"):
+        return "auth"
+    if path.startswith("/api/loan/"):
+        return "loan"
+    return None
+
+def _client_identity():
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    if identity:
+        return f"user:{identity}", True
+    return f"ip:{request.remote_addr or 'unknown'}", False
+
+@app.before_request
+def _admit():
+    if admission is None or request.method == "OPTIONS":
+        return None
+    pool = _admission_pool(request.path)
+    if pool is None:
+        return None
+
+    key, authenticated = _client_identity()
+    retry_after = admission.check_rate(pool, key)
+    if retry_after:
+        resp = jsonify({"error": "Too many requests"})
+        resp.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+        return resp, 429
+
+    reason = admission.acquire(
+        pool, high_priority=authenticated,
+        queued_s=queue_age_s(request.headers.get("X-Request-Start")),
+    )
+    if reason:
+        resp = jsonify({"error": "Server busy, please retry", "reason": reason})
+        resp.headers["Retry-After"] = "1"
+        return resp, 503
+    g.admission = (pool, authenticated, time.perf_counter())
+    return None
+
+@app.teardown_request
+def _release(exc):
+    slot = g.pop("admission", None)
+    if slot is not None:
+        pool, authenticated, started = slot
+        admission.release(pool, authenticated, time.perf_counter() - started)
+
+# -------------------------------
+# Conditional GET & compression
+# -------------------------------
+COMPRESS_MIN_BYTES = 1024
+
+def _not_modified(etag):
+    """304 response if the client already holds this ETag, else None."""
+    if request.if_none_match.contains_weak(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag, weak=True)
+        resp.vary.add("Accept-Encoding")
+        resp.headers["Cache-Control"] = "private, no-cache"
+        return resp
+    return None
+
+def _tagged(resp, etag):
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+@app.after_request
+def _compress(resp):
+    if (resp.status_code != 200 or resp.direct_passthrough
+            or "Content-Encoding" in resp.headers
+            or not resp.mimetype or not resp.mimetype.startswith("application/json")):
+        return resp
+    # The representation depends on Accept-Encoding whether or not this one
+    # gets compressed; caches must key on it for every eligible response
+    resp.vary.add("Accept-Encoding")
+    body = resp.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return resp
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        body, encoding = brotli.compress(body, quality=5), "br"
+    elif accepted["gzip"]:
+        body, encoding = gzip.compress(body, compresslevel=6), "gzip"
+    else:
+        return resp
+    resp.set_data(body)
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
 # -------------------------------
 # Model helpers
 # -------------------------------
@@ -128,15 +254,24 @@ def load_pipeline(path=MODEL_PATH):
         pipeline = pickle.load(f)
     return pipeline
 
-def save_pipeline_atomic(pipeline, path=MODEL_PATH):
-    fd, tmp_path = tempfile.mkstemp(suffix=".pkl")
-    os.close(fd)
-    with open(tmp_path, "wb") as f:
-        pickle.dump(pipeline, f)
-    if path.exists():
-        ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-        shutil.copy2(path, BACKUP_DIR / f"loan_pipeline_{ts}.pkl")
-    os.replace(tmp_path, path)
+artifact_store = ArtifactStore(ARTIFACT_DIR, keep=Config.ARTIFACT_KEEP,
+                               keep_promoted=Config.ARTIFACT_KEEP_PROMOTED)
+try:
+    artifact_store.import_legacy_backups(LEGACY_BACKUP_DIR)
+except Exception as e:
+    app.logger.warning("Could not import legacy model backups: %s", e)
+
+def save_pipeline_atomic(pipeline, path=MODEL_PATH, meta=None):
+    """Store the pipeline by content hash and atomically point `path` at it.
+
+    Saving to the live MODEL_PATH also promotes it (kept for rollback) and
+    applies the retention policy. Returns the artifact hash.
+    """
+    if Path(path) == MODEL_PATH:
+        return artifact_store.save(pipeline, path, meta=meta)
+    digest = artifact_store.put(pipeline, meta=meta)
+    artifact_store.materialize(digest, path)
+    return digest
 
 def save_metadata(meta: dict, path=META_PATH):
     meta['saved_at'] = datetime.utcnow().isoformat() + "Z"
@@ -156,6 +291,276 @@ try:
 except Exception as e:
     model = None
     app.logger.warning("No model loaded at startup: %s", e)
+try:
+    # Track a live file that predates the store, so it is the first rollback target
+    model_hash = artifact_store.adopt(MODEL_PATH)   # artifact this worker serves
+except Exception as e:
+    model_hash = artifact_store.current()
+    app.logger.warning("Could not adopt %s into the artifact store: %s", MODEL_PATH, e)
+
+drift_monitor = DriftMonitor.from_metadata(
+    META_PATH, EXPECTED_FEATURES,
+    collection_getter=lambda: mongo.db.retrain_logs,
+    logger=app.logger,
+)
+if drift_monitor is None:
+    app.logger.warning("No reference profile in %s; drift monitoring disabled", META_PATH)
+else:
+    drift_monitor.start()
+    atexit.register(drift_monitor.flush)
+
+def ensure_indexes():
+    """Indexes behind hot queries; in the background so a slow Mongo can't block boot."""
+    try:
+        # /api/model/logs: newest-first sort and its ETag probe
+        mongo.db.retrain_logs.create_index([("saved_at", -1)])
+    except Exception as e:
+        app.logger.warning(f"Index creation failed: {e}")
+
+threading.Thread(target=ensure_indexes, name="ensure-indexes", daemon=True).start()
+
+def load_shadow(path=None, sample_rate=None, canary_percent=None):
+    path = path or CANDIDATE_PATH
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("SHADOW_SAMPLE_RATE", 0.1))
+    if canary_percent is None:
+        canary_percent = float(os.environ.get("CANARY_PERCENT", 0))
+    return ShadowEvaluator(
+        load_pipeline(path), candidate_path=path,
+        sample_rate=sample_rate, canary_percent=canary_percent,
+        logger=app.logger,
+    )
+
+# Shadow settings live in SHADOW_CONFIG_PATH so that every gunicorn worker
+# picks up a change made through the API (see sync_worker_state).
+def write_shadow_config(active, sample_rate=None, canary_percent=None):
+    fd, tmp = tempfile.mkstemp(dir=SHADOW_CONFIG_PATH.parent, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump({
+            "active": active,
+            "sample_rate": sample_rate,
+            "canary_percent": canary_percent,
+            "updated_at": datetime.utcnow().isoformat() + "Z",
+        }, f)
+    os.replace(tmp, SHADOW_CONFIG_PATH)
+
+def apply_shadow_config():
+    """(Re)build this worker's shadow evaluator from the config file (or env defaults)."""
+    global shadow
+    try:
+        with open(SHADOW_CONFIG_PATH) as f:
+            cfg = json.load(f)
+    except (OSError, ValueError):
+        cfg = {"active": CANDIDATE_PATH.exists()}
+
+    new_shadow = None
+    if cfg.get("active") and CANDIDATE_PATH.exists():
+        try:
+            new_shadow = load_shadow(sample_rate=cfg.get("sample_rate"),
+                                     canary_percent=cfg.get("canary_percent"))
+            app.logger.info("Loaded candidate pipeline from %s", CANDIDATE_PATH)
+        except Exception as e:
+            app.logger.warning("Candidate pipeline not loaded: %s", e)
+    with model_lock:
+        old, shadow = shadow, new_shadow
+    if old is not None:
+        old.close()
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def reload_live_model():
+    """Serve the store's current artifact if it differs from this worker's model."""
+    global model, model_hash
+    digest = artifact_store.current()
+    if not digest or digest == model_hash:
+        return
+    try:
+        pipeline = load_pipeline(artifact_store.object_path(digest))
+    except Exception as e:
+        app.logger.warning("Live artifact %s not loaded: %s", digest[:12], e)
+        return
+    with model_lock:
+        model, model_hash = pipeline, digest
+    app.logger.info("Reloaded live pipeline (artifact %s)", digest[:12])
+
+shadow = None
+_shadow_config_mtime = _mtime(SHADOW_CONFIG_PATH)
+_artifact_index_mtime = _mtime(artifact_store.index_path)
+apply_shadow_config()
+
+def sync_worker_state():
+    """Pick up model changes made by other workers (or the trainer) via file mtimes."""
+    global _shadow_config_mtime, _artifact_index_mtime
+    mtime = _mtime(SHADOW_CONFIG_PATH)
+    if mtime != _shadow_config_mtime:
+        _shadow_config_mtime = mtime
+        apply_shadow_config()
+    # Promotions (rollback in another worker, a retrain) rewrite the index
+    mtime = _mtime(artifact_store.index_path)
+    if mtime != _artifact_index_mtime:
+        _artifact_index_mtime = mtime
+        reload_live_model()
+
+def _sync_loop():
+    # Runs off the request path: unpickling a model must not hold an admitted request
+    while True:
+        time.sleep(WORKER_SYNC_INTERVAL_S)
+        try:
+            sync_worker_state()
+        except Exception as e:
+            app.logger.warning("Worker sync failed: %s", e)
+
+threading.Thread(target=_sync_loop, name="worker-sync", daemon=True).start()
+
+# -------------------------------
+# Decision helpers
+# -------------------------------
+# What-if search bounds for /api/predict/max-loan (loan_term is in years, 2-20 in the dataset)
+WHATIF_TERMS = list(range(2, 21, 2))
+WHATIF_STEPS = 40
+WHATIF_MAX_STEPS = 200
+WHATIF_MAX_TERMS = 30
+
+# Hard business rules applied on top of the model: (feature, op, limit, reason).
+# A request is rejected when op(feature, limit) is true.
+DECISION_RULES = [
+    ("cibil_score", operator.lt, 650, "CIBIL score is too low (<650)."),
+    ("loan_to_income", operator.gt, 2, "Loan-to-Income ratio is too high (>2)."),
+    ("asset_coverage", operator.lt, 1, "Assets do not sufficiently cover the loan amount."),
+    ("income_annum", operator.lt, 200000, "Annual income is too low for this loan request."),
+]
+
+def applicant_features(data):
+    """Parse a /predict payload into the feature row the pipeline expects."""
+    income_annum = float(data.get("income_annum", 0))
+    loan_amount = float(data.get("loan_amount", 0))
+    residential_assets = float(data.get("residential_assets_value", 0))
+    commercial_assets = float(data.get("commercial_assets_value", 0))
+    luxury_assets = float(data.get("luxury_assets_value", 0))
+    bank_assets = float(data.get("bank_asset_value", 0))
+
+    debt_to_income = loan_amount / income_annum if income_annum > 0 else 0
+    loan_to_income = loan_amount / income_annum if income_annum > 0 else 0
+    asset_coverage = (
+        residential_assets + commercial_assets + luxury_assets + bank_assets
+    ) / loan_amount if loan_amount > 0 else 0
+
+    return {
+        "education": data.get("education", "Graduate"),
+        "self_employed": data.get("self_employed", "No"),
+        "no_of_dependents": float(data.get("no_of_dependents", 0)),
+        "income_annum": income_annum,
+        "loan_amount": loan_amount,
+        "loan_term": float(data.get("loan_term", 0)),
+        "cibil_score": float(data.get("cibil_score", 0)),
+        "residential_assets_value": residential_assets,
+        "commercial_assets_value": commercial_assets,
+        "luxury_assets_value": luxury_assets,
+        "bank_asset_value": bank_assets,
+        "debt_to_income": debt_to_income,
+        "asset_coverage": asset_coverage,
+        "loan_to_income": loan_to_income
+    }
+
+def variant_frame(features, amounts, terms):
+    """Cartesian product of loan amounts x terms for one applicant, derived columns recomputed."""
+    amounts = np.asarray(amounts, dtype=float)
+    terms = np.asarray(terms, dtype=float)
+    amount_col = np.tile(amounts, len(terms))
+    term_col = np.repeat(terms, len(amounts))
+
+    df = pd.DataFrame([features] * len(amount_col))
+    df["loan_amount"] = amount_col
+    df["loan_term"] = term_col
+    income = features["income_annum"]
+    ratio = amount_col / income if income > 0 else np.zeros_like(amount_col)
+    df["debt_to_income"] = ratio
+    df["loan_to_income"] = ratio
+    assets = (
+        features["residential_assets_value"] + features["commercial_assets_value"]
+        + features["luxury_assets_value"] + features["bank_asset_value"]
+    )
+    df["asset_coverage"] = np.divide(
+        assets, amount_col, out=np.zeros_like(amount_col), where=amount_col > 0
+    )
+    return df
+
+def approve_mask(pipeline, df):
+    """Final decision (model AND rules) for every row in one predict call."""
+    approved = np.asarray(pipeline.predict(df)) == 1
+    for col, op, limit, _ in DECISION_RULES:
+        approved &= ~np.asarray(op(df[col], limit))
+    return approved
+
+def rule_amount_cap(features):
+    """Largest amount the loan-to-income and asset-coverage rules can allow."""
+    assets = (
+        features["residential_assets_value"] + features["commercial_assets_value"]
+        + features["luxury_assets_value"] + features["bank_asset_value"]
+    )
+    return min(2 * features["income_annum"], assets)
+
+def whatif_search(pipeline, features, terms, steps, upper):
+    """Largest approved amount per term in (0, upper], in two batched predicts.
+
+    Pass 1 scores a coarse grid (plus the requested amount) for every term.
+    Pass 2 refines each term upward from its last approved grid point, or,
+    if nothing on the grid was approved, scans below the first grid point.
+    Returns ({term: amount or None}, terms approving the requested amount,
+    variants scored).
+    """
+    requested_amount = features["loan_amount"]
+    amounts = np.linspace(upper / steps, upper, steps)
+    if 0 < requested_amount <= upper:
+        amounts = np.unique(np.append(amounts, requested_amount))
+    coarse = approve_mask(pipeline, variant_frame(features, amounts, terms))
+    coarse = coarse.reshape(len(terms), len(amounts))
+    scored = coarse.size
+
+    best = {}
+    refine = []   # (term, amounts, extend_from_boundary)
+    for i, term in enumerate(terms):
+        approved_idx = np.flatnonzero(coarse[i])
+        if not len(approved_idx):
+            best[term] = None
+            refine.append((term, np.linspace(0, amounts[0], steps + 2)[1:-1], False))
+            continue
+        last = approved_idx[-1]
+        best[term] = float(amounts[last])
+        if last + 1 < len(amounts):
+            refine.append((term, np.linspace(amounts[last], amounts[last + 1], steps + 2)[1:-1], True))
+
+    if refine:
+        frame = pd.concat(
+            [variant_frame(features, fine, [term]) for term, fine, _ in refine],
+            ignore_index=True
+        )
+        fine_mask = approve_mask(pipeline, frame)
+        scored += len(fine_mask)
+        offset = 0
+        for term, fine, from_boundary in refine:
+            hits = np.flatnonzero(fine_mask[offset:offset + len(fine)])
+            offset += len(fine)
+            if not from_boundary:
+                if len(hits):
+                    best[term] = float(fine[hits[-1]])
+                continue
+            # Only extend contiguously from the coarse boundary
+            run = 0
+            while run < len(hits) and hits[run] == run:
+                run += 1
+            if run:
+                best[term] = float(fine[run - 1])
+
+    requested_ok = []
+    if requested_amount in amounts:
+        col = int(np.flatnonzero(amounts == requested_amount)[0])
+        requested_ok = [t for i, t in enumerate(terms) if coarse[i, col]]
+    return best, requested_ok, scored
 
 # -------------------------------
 # Routes
@@ -176,58 +581,23 @@ def predict():
         return jsonify({"error": "No input data provided"}), 400
 
     try:
-        no_of_dependents = float(data.get("no_of_dependents", 0))
-        education = data.get("education", "Graduate")
-        self_employed = data.get("self_employed", "No")
-        income_annum = float(data.get("income_annum", 0))
-        loan_amount = float(data.get("loan_amount", 0))
-        loan_term = float(data.get("loan_term", 0))
-        cibil_score = float(data.get("cibil_score", 0))
-        residential_assets = float(data.get("residential_assets_value", 0))
-        commercial_assets = float(data.get("commercial_assets_value", 0))
-        luxury_assets = float(data.get("luxury_assets_value", 0))
-        bank_assets = float(data.get("bank_asset_value", 0))
-
-        debt_to_income = loan_amount / income_annum if income_annum > 0 else 0
-        loan_to_income = loan_amount / income_annum if income_annum > 0 else 0
-        asset_coverage = (
-            residential_assets + commercial_assets + luxury_assets + bank_assets
-        ) / loan_amount if loan_amount > 0 else 0
-
-        input_df = pd.DataFrame([{
-            "education": education,
-            "self_employed": self_employed,
-            "no_of_dependents": no_of_dependents,
-            "income_annum": income_annum,
-            "loan_amount": loan_amount,
-            "loan_term": loan_term,
-            "cibil_score": cibil_score,
-            "residential_assets_value": residential_assets,
-            "commercial_assets_value": commercial_assets,
-            "luxury_assets_value": luxury_assets,
-            "bank_asset_value": bank_assets,
-            "debt_to_income": debt_to_income,
-            "asset_coverage": asset_coverage,
-            "loan_to_income": loan_to_income
-        }])
-
-        raw_prediction = model.predict(input_df)[0]
+        features = applicant_features(data)
+        input_df = pd.DataFrame([features])
+
+        evaluator = shadow
+        if evaluator is not None:
+            raw_prediction = evaluator.predict(model, input_df)
+        else:
+            raw_prediction = model.predict(input_df)[0]
+        if drift_monitor is not None:
+            drift_monitor.observe(features, raw_prediction == 1)
         model_result = "Approved" if raw_prediction == 1 else "Rejected"
         model_reasons = [f"Model said: {model_result}"]
 
         final_result = model_result
-        rule_reasons = []
-        if cibil_score < 650:
-            rule_reasons.append("CIBIL score is too low (<650).")
-            final_result = "Rejected"
-        if loan_to_income > 2:
-            rule_reasons.append("Loan-to-Income ratio is too high (>2).")
-            final_result = "Rejected"
-        if asset_coverage < 1:
-            rule_reasons.append("Assets do not sufficiently cover the loan amount.")
-            final_result = "Rejected"
-        if income_annum < 200000:
-            rule_reasons.append("Annual income is too low for this loan request.")
+        rule_reasons = [reason for col, op, limit, reason in DECISION_RULES
+                        if op(features[col], limit)]
+        if rule_reasons:
             final_result = "Rejected"
 
         if final_result == "Approved" and not rule_reasons:
@@ -250,11 +620,67 @@ def predict():
 def api_predict():
     return predict()
 
+@app.route("/api/predict/max-loan", methods=["POST"])
+def predict_max_loan():
+    """Approval boundary for loan amount per term (see whatif_search)."""
+    if model is None:
+        return jsonify({"error": "Model not loaded"}), 500
+
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No input data provided"}), 400
+
+    try:
+        features = applicant_features(data)
+        steps = min(max(int(data.get("steps", WHATIF_STEPS)), 2), WHATIF_MAX_STEPS)
+        terms = sorted({float(t) for t in (data.get("terms") or WHATIF_TERMS)})[:WHATIF_MAX_TERMS]
+        requested_amount = features["loan_amount"]
+        upper = float(data.get("max_amount") or max(requested_amount, 2 * features["income_annum"]))
+        # Nothing above the rule-implied ceiling can be approved; don't spend the grid on it
+        cap = rule_amount_cap(features)
+        if cap > 0:
+            upper = min(upper, cap)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid input: {str(e)}"}), 400
+    if upper <= 0 or not terms:
+        return jsonify({"error": "Need a positive max_amount (or income/loan_amount) and at least one term"}), 400
+
+    try:
+        best, requested_ok, scored = whatif_search(model, features, terms, steps, upper)
+
+        by_term = [{"loan_term": t, "max_approvable_amount": best[t]} for t in terms]
+        approvable = [row for row in by_term if row["max_approvable_amount"] is not None]
+        top = max(approvable, key=lambda r: r["max_approvable_amount"]) if approvable else None
+
+        return jsonify({
+            "max_approvable_amount": top["max_approvable_amount"] if top else None,
+            "best_term": top["loan_term"] if top else None,
+            "by_term": by_term,
+            "requested_amount": requested_amount,
+            "requested_amount_terms_approved": requested_ok,
+            "min_term_for_requested_amount": min(requested_ok) if requested_ok else None,
+            "variants_scored": int(scored),
+        })
+
+    except Exception as e:
+        return jsonify({"error": f"What-if search failed: {str(e)}"}), 500
+
 # === Loan Routes =================================================
 def _get_user_id_from_jwt():
     """Simplified: identity is exactly what we set at login/register."""
     return str(get_jwt_identity() or "")
 
+def admin_required(fn):
+    """jwt_required + the user's stored role must be 'admin'."""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        user = User.find_by_id(_get_user_id_from_jwt())
+        if not user or user.get("role") != "admin":
+            return jsonify({"error": "Admin only"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
 @app.route("/api/loan/apply", methods=["POST"])
 @jwt_required()
 def loan_apply():
@@ -269,10 +695,30 @@ def loan_apply():
         "income_annum": float(payload.get("income_annum", 0)),
         "cibil_score": float(payload.get("cibil_score", 0)),
         "status": payload.get("status", "Pending"),
-        "created_at": payload.get("created_at") or datetime.utcnow().isoformat() + "Z",
-        "raw": payload.get("raw") or None
+        # Parsed server-side: rollup day keys (and created_at sorting) depend on it
+        "created_at": normalize_created_at(payload.get("created_at")) or datetime.utcnow().isoformat() + "Z",
+        "raw": payload.get("raw") or None,
+        "inserted_at": datetime.utcnow(),   # rebuild_rollups replays loans newer than its start
     }
+    scope = user_loans_scope(user_id)
+    # Bump before writing (so a failure rejects the request before anything is
+    # stored) and again after, so a read between the two can't be cached
+    try:
+        bump(mongo.db, scope)
+    except Exception as e:
+        app.logger.error(f"Loan version bump failed, nothing saved: {e}")
+        return jsonify({"error": "Could not save loan, please retry"}), 503
     mongo.db.loans.insert_one(doc)
+    try:
+        record_loan(mongo.db, doc)
+    except Exception as e:
+        app.logger.warning(f"Loan rollup update failed: {e}")
+    doc["_id"] = str(doc["_id"])
+    try:
+        bump(mongo.db, scope)
+    except Exception as e:
+        # The loan is committed: report success, a retry would duplicate it
+        app.logger.error(f"Loan version bump after insert failed: {e}")
     return jsonify({"ok": True, "loan": doc}), 201
 
 @app.route("/api/loan/my", methods=["GET"])
@@ -282,12 +728,18 @@ def loan_my():
     if not user_id:
         return jsonify({"error": "user_id missing in token"}), 401
 
+    etag = make_etag("loan_my", user_id,
+                     *versions(mongo.db, [GLOBAL_LOANS_SCOPE, user_loans_scope(user_id)]))
+    cached = _not_modified(etag)
+    if cached is not None:
+        return cached
+
     cur = mongo.db.loans.find({"user_id": user_id}).sort("created_at", -1)
     loans = []
     for d in cur:
         d["_id"] = str(d["_id"])
         loans.append(d)
-    return jsonify({"loans": loans})
+    return _tagged(jsonify({"loans": loans}), etag)
 
 @app.route("/api/loan/stats", methods=["GET"])
 @jwt_required()
@@ -296,6 +748,14 @@ def loan_stats():
     if not user_id:
         return jsonify({"error": "user_id missing in token"}), 401
 
+    # recent_30d depends on the clock too, so the tag rolls over every hour
+    hour = datetime.utcnow().strftime("%Y-%m-%dT%H")
+    etag = make_etag("loan_stats", user_id, hour,
+                     *versions(mongo.db, [GLOBAL_LOANS_SCOPE, user_loans_scope(user_id)]))
+    cached = _not_modified(etag)
+    if cached is not None:
+        return cached
+
     total = mongo.db.loans.count_documents({"user_id": user_id})
     approved = mongo.db.loans.count_documents({"user_id": user_id, "status": "Approved"})
     rejected = mongo.db.loans.count_documents({"user_id": user_id, "status": "Rejected"})
@@ -303,23 +763,175 @@ def loan_stats():
     since = (datetime.utcnow() - timedelta(days=30)).isoformat() + "Z"
     recent = mongo.db.loans.count_documents({"user_id": user_id, "created_at": {"$gte": since}})
 
-    return jsonify({
+    return _tagged(jsonify({
         "total": total,
         "approved": approved,
         "rejected": rejected,
         "approval_rate": round(approval_rate, 2),
         "recent_30d": recent
-    })
+    }), etag)
+
+@app.route("/api/admin/rollups", methods=["GET"])
+@admin_required
+def admin_rollups():
+    try:
+        days = min(max(int(request.args.get("days", 30)), 0), 366)
+    except ValueError:
+        return jsonify({"error": "days must be an integer"}), 400
+    today = datetime.utcnow().date()
+    day_keys = [(today - timedelta(days=i)).isoformat() for i in range(days - 1, -1, -1)]
+    return jsonify(read_rollups(mongo.db, day_keys))
+
+@app.route("/api/admin/rollups/rebuild", methods=["POST"])
+@admin_required
+def admin_rollups_rebuild():
+    count = rebuild_rollups(mongo.db)
+    return jsonify({"ok": True, "rollup_documents": count})
 
 @app.route("/api/model/logs", methods=["GET"])
 @jwt_required()
 def model_logs():
-    cur = mongo.db.retrain_logs.find().sort("saved_at", -1)
+    query = {"kind": {"$ne": "drift"}}
+    latest = mongo.db.retrain_logs.find_one(query, {"saved_at": 1}, sort=[("saved_at", -1)])
+    etag = make_etag("model_logs", latest["_id"] if latest else None,
+                     latest.get("saved_at") if latest else None)
+    cached = _not_modified(etag)
+    if cached is not None:
+        return cached
+
+    cur = mongo.db.retrain_logs.find(query).sort("saved_at", -1)
     logs = []
     for d in cur:
         d["_id"] = str(d["_id"])
         logs.append(d)
-    return jsonify({"logs": logs})
+    return _tagged(jsonify({"logs": logs}), etag)
+
+@app.route("/api/model/drift", methods=["GET"])
+@jwt_required()
+def model_drift():
+    if drift_monitor is None:
+        return jsonify({"error": "Drift monitoring disabled (no reference profile)"}), 503
+    window = request.args.get("window", "").lower() in ("1", "true", "yes")
+    return jsonify({"window": window, **drift_monitor.scores(window=window)})
+
+@app.route("/api/model/shadow", methods=["GET"])
+@jwt_required()
+def shadow_stats():
+    """Stats are per worker process; each worker mirrors its own traffic."""
+    if shadow is None:
+        return jsonify({"active": False, "worker_pid": os.getpid()})
+    return jsonify({"active": True, "worker_pid": os.getpid(), **shadow.stats()})
+
+@app.route("/api/model/shadow", methods=["POST"])
+@admin_required
+def shadow_start():
+    """(Re)load the candidate pipeline from CANDIDATE_PATH and start mirroring in every worker."""
+    global _shadow_config_mtime
+    payload = request.get_json(silent=True) or {}
+    try:
+        sample_rate = float(payload.get("sample_rate", os.environ.get("SHADOW_SAMPLE_RATE", 0.1)))
+        canary_percent = float(payload.get("canary_percent", os.environ.get("CANARY_PERCENT", 0)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "sample_rate and canary_percent must be numbers"}), 400
+    if not (0 <= sample_rate <= 1) or not (0 <= canary_percent <= 100):
+        return jsonify({"error": "sample_rate must be 0-1 and canary_percent 0-100"}), 400
+    if not CANDIDATE_PATH.exists():
+        return jsonify({"error": f"No candidate pipeline at {CANDIDATE_PATH.name}"}), 404
+
+    try:
+        load_pipeline(CANDIDATE_PATH)
+    except Exception as e:
+        return jsonify({"error": f"Candidate load failed: {str(e)}"}), 500
+    write_shadow_config(True, sample_rate, canary_percent)
+    _shadow_config_mtime = _mtime(SHADOW_CONFIG_PATH)
+    apply_shadow_config()
+    if shadow is None:
+        return jsonify({"error": "Candidate load failed"}), 500
+    return jsonify({"active": True, "worker_pid": os.getpid(), **shadow.stats()})
+
+@app.route("/api/model/shadow", methods=["DELETE"])
+@admin_required
+def shadow_stop():
+    global _shadow_config_mtime
+    old = shadow
+    write_shadow_config(False)
+    _shadow_config_mtime = _mtime(SHADOW_CONFIG_PATH)
+    apply_shadow_config()
+    if old is None:
+        return jsonify({"active": False})
+    return jsonify({"active": False, "final_stats": old.stats()})
+
+@app.route("/api/model/shadow/promote", methods=["POST"])
+@admin_required
+def shadow_promote():
+    """Make the shadowed candidate the live model through the artifact store.
+
+    The candidate is stored and promoted (the old live model stays as the
+    rollback target), its metadata replaces the live metadata, and shadowing
+    stops. Other workers switch on their next sync.
+    """
+    global model, model_hash, _shadow_config_mtime
+    if not CANDIDATE_PATH.exists():
+        return jsonify({"error": f"No candidate pipeline at {CANDIDATE_PATH.name}"}), 404
+    old = shadow
+    try:
+        digest = artifact_store.put_file(CANDIDATE_PATH, meta={"source": "promoted candidate"})
+        pipeline = load_pipeline(artifact_store.object_path(digest))
+    except Exception as e:
+        return jsonify({"error": f"Candidate load failed: {str(e)}"}), 500
+
+    with model_lock:
+        artifact_store.promote(digest, live_path=MODEL_PATH)
+        model, model_hash = pipeline, digest
+    if CANDIDATE_META_PATH.exists():
+        # Drift monitors pick up the new reference profile on restart
+        os.replace(CANDIDATE_META_PATH, META_PATH)
+    os.remove(CANDIDATE_PATH)
+    write_shadow_config(False)
+    _shadow_config_mtime = _mtime(SHADOW_CONFIG_PATH)
+    apply_shadow_config()
+    return jsonify({
+        "ok": True, "live": digest,
+        "final_stats": old.stats() if old is not None else None,
+    })
+
+@app.route("/api/admission/stats", methods=["GET"])
+@jwt_required()
+def admission_stats():
+    if admission is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **admission.stats()})
+
+@app.route("/api/model/artifacts", methods=["GET"])
+@jwt_required()
+def model_artifacts():
+    return jsonify({
+        "live": artifact_store.current(),
+        "disk_usage_bytes": artifact_store.disk_usage(),
+        "artifacts": artifact_store.list(),
+    })
+
+@app.route("/api/model/rollback", methods=["POST"])
+@admin_required
+def model_rollback():
+    """Promote a stored artifact (default: the previously promoted one) and serve it.
+
+    Other workers switch over on their next sync (WORKER_SYNC_INTERVAL_S).
+    """
+    global model, model_hash
+    payload = request.get_json(silent=True) or {}
+    digest = payload.get("hash") or artifact_store.previous()
+    if not digest or artifact_store.get(digest) is None:
+        return jsonify({"error": "No artifact to roll back to"}), 404
+
+    try:
+        pipeline = load_pipeline(artifact_store.object_path(digest))
+    except Exception as e:
+        return jsonify({"error": f"Artifact load failed: {str(e)}"}), 500
+    with model_lock:
+        artifact_store.promote(digest, live_path=MODEL_PATH)
+        model, model_hash = pipeline, digest
+    return jsonify({"ok": True, "live": digest})
 
 # -------------------------------
 # Error Handlers
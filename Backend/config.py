@@ -10,6 +10,9 @@ class Config:
     MONGO_URI = os.getenv("MONGO_URI")  # Always use .env online URI
     MONGO_DBNAME = os.getenv("MONGO_DBNAME", "loanpredictor")
     MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "loanapplications")
+    # Model artifact retention (shared by app.py and utils/improved_train.py)
+    ARTIFACT_KEEP = int(os.getenv("ARTIFACT_KEEP", 5))
+    ARTIFACT_KEEP_PROMOTED = int(os.getenv("ARTIFACT_KEEP_PROMOTED", 3))
 
 # ✅ Add JWT secret (fixes your 500 error)
     JWT_SECRET = os.getenv("JWT_SECRET", "super-secret-key")
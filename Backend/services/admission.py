@@ -0,0 +1,221 @@
+# Backend/services/admission.py
+"""
+Admission control and load shedding for the Flask workers.
+
+Each route class gets a small concurrency pool with a bounded wait queue and
+a latency budget: requests that would wait longer than the budget are
+rejected immediately (503) instead of piling up. Anonymous (low-priority)
+requests may only hold part of each pool's slots, so authenticated callers
+keep getting through an anonymous spike. The cap is per pool: /api/auth/* is
+anonymous by nature (login, register) and is exempt, so a /predict flood
+can't lock users out of signing in. Per-identity token
+buckets (JWT identity, else client IP) answer 429 before any work is done.
+
+All state is per process; with several gunicorn workers the limits apply to
+each worker separately. Shedding only happens if a worker can hold more
+requests than it admits, so run gunicorn with gthread workers and more
+threads than `capacity` (see render.yaml / Procfile). Time a request already
+spent queued in front of the worker (X-Request-Start, set by the proxy) is
+counted against the latency budget too.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+EWMA_ALPHA = 0.2
+MAX_BUCKETS = 50000
+LOW_PRIORITY_SHARE = 0.75  # default share of a pool's slots anonymous requests may hold
+
+
+class Policy:
+    __slots__ = ("max_concurrent", "max_queue", "budget_s", "rate", "burst", "low_priority_share")
+
+    def __init__(self, max_concurrent, max_queue, budget_s, rate, burst, low_priority_share=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.budget_s = budget_s
+        self.rate = rate          # tokens per second per identity
+        self.burst = burst        # bucket size
+        self.low_priority_share = low_priority_share   # None: the controller's default
+
+
+DEFAULT_POLICIES = {
+    # /predict and /api/predict*: model inference
+    "predict": Policy(max_concurrent=4, max_queue=16, budget_s=1.0, rate=5.0, burst=20),
+    # /api/auth/*: password hashing is deliberately slow
+    # (always anonymous, so not capped: it must not compete with anonymous /predict)
+    "auth": Policy(max_concurrent=2, max_queue=8, budget_s=2.0, rate=1.0, burst=5,
+                   low_priority_share=1.0),
+    # /api/loan/*: authenticated user traffic
+    "loan": Policy(max_concurrent=8, max_queue=32, budget_s=1.0, rate=10.0, burst=30),
+}
+
+
+def queue_age_s(header, now=None):
+    """Seconds since a proxy's X-Request-Start ("t=<epoch>" in s, ms or us); None if absent/bad."""
+    if not header:
+        return None
+    value = header.strip()
+    if value.startswith("t="):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    # Normalise by magnitude: ~1.7e9 seconds, ~1.7e12 ms, ~1.7e15 us
+    while started > 1e11:
+        started /= 1000.0
+    now = time.time() if now is None else now
+    return max(0.0, now - started)
+
+
+class TokenBuckets:
+    """Bounded LRU of key -> [tokens, last_refill]; the oldest keys are evicted."""
+
+    def __init__(self, max_keys=MAX_BUCKETS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """Consume one token. Returns 0.0 if allowed, else seconds until a token frees up."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(burst), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / rate if rate > 0 else 1.0
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class _Pool:
+    def __init__(self, name, policy, low_priority_share):
+        self.name = name
+        self.policy = policy
+        share = policy.low_priority_share if policy.low_priority_share is not None else low_priority_share
+        self.low_priority_limit = max(1, int(policy.max_concurrent * share))
+        self.inflight = 0
+        self.low_inflight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.ewma_service_s = 0.0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = {"queue_full": 0, "latency_budget": 0, "timeout": 0, "queue_time": 0}
+
+    def stats(self):
+        return {
+            "max_concurrent": self.policy.max_concurrent,
+            "max_queue": self.policy.max_queue,
+            "low_priority_limit": self.low_priority_limit,
+            "low_priority_inflight": self.low_inflight,
+            "budget_ms": round(self.policy.budget_s * 1000.0, 1),
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "ewma_service_ms": round(self.ewma_service_s * 1000.0, 3),
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": dict(self.shed),
+        }
+
+
+class AdmissionController:
+    def __init__(self, policies=None, capacity=None, low_priority_share=LOW_PRIORITY_SHARE):
+        policies = policies or DEFAULT_POLICIES
+        self.pools = {name: _Pool(name, p, low_priority_share) for name, p in policies.items()}
+        self.capacity = capacity or sum(p.max_concurrent for p in policies.values())
+        self.buckets = TokenBuckets()
+        self._cond = threading.Condition()
+        self._inflight = 0
+
+    def check_rate(self, pool_name, key):
+        """0.0 if the identity may proceed, else a Retry-After in seconds."""
+        pool = self.pools[pool_name]
+        wait = self.buckets.take(f"{pool_name}:{key}", pool.policy.rate, pool.policy.burst)
+        if wait:
+            with self._cond:
+                pool.rate_limited += 1
+        return wait
+
+    def acquire(self, pool_name, high_priority, queued_s=0.0):
+        """Wait for a slot within the latency budget. Returns None or a shed reason.
+
+        queued_s is time already spent waiting upstream of the process; it
+        is taken off the budget.
+        """
+        pool = self.pools[pool_name]
+        policy = pool.policy
+        budget_s = policy.budget_s - (queued_s or 0.0)
+        with self._cond:
+            if budget_s <= 0:
+                pool.shed["queue_time"] += 1
+                return "queue_time"
+            if not self._has_slot(pool, high_priority):
+                if pool.queued >= policy.max_queue:
+                    pool.shed["queue_full"] += 1
+                    return "queue_full"
+                expected_wait = (pool.queued + 1) * pool.ewma_service_s / policy.max_concurrent
+                if expected_wait > budget_s:
+                    pool.shed["latency_budget"] += 1
+                    return "latency_budget"
+
+                pool.queued += 1
+                pool.peak_queued = max(pool.peak_queued, pool.queued)
+                deadline = time.monotonic() + budget_s
+                try:
+                    while not self._has_slot(pool, high_priority):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            pool.shed["timeout"] += 1
+                            return "timeout"
+                        self._cond.wait(remaining)
+                finally:
+                    pool.queued -= 1
+
+            pool.inflight += 1
+            pool.admitted += 1
+            self._inflight += 1
+            if not high_priority:
+                pool.low_inflight += 1
+            return None
+
+    def release(self, pool_name, high_priority, elapsed_s):
+        pool = self.pools[pool_name]
+        with self._cond:
+            pool.inflight -= 1
+            self._inflight -= 1
+            if not high_priority:
+                pool.low_inflight -= 1
+            if pool.ewma_service_s:
+                pool.ewma_service_s += EWMA_ALPHA * (elapsed_s - pool.ewma_service_s)
+            else:
+                pool.ewma_service_s = elapsed_s
+            self._cond.notify_all()
+
+    def _has_slot(self, pool, high_priority):
+        if pool.inflight >= pool.policy.max_concurrent or self._inflight >= self.capacity:
+            return False
+        return high_priority or pool.low_inflight < pool.low_priority_limit
+
+    def stats(self):
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "inflight": self._inflight,
+                "tracked_identities": len(self.buckets),
+                "pools": {name: pool.stats() for name, pool in self.pools.items()},
+            }
@@ -0,0 +1,331 @@
+# Backend/services/artifact_store.py
+"""
+Content-addressed store for pickled pipelines.
+
+Objects live at <root>/objects/<sha256>.pkl and are written by streaming
+pickle output through a hashing writer into a temp file, so a large model is
+never held twice in memory. Saving an identical pipeline again reuses the
+existing object. <root>/index.json maps hash -> size, time and a metadata
+summary, and records the promotion history used for rollback. A live file
+that predates the store is adopted before it is replaced. Retention
+keeps the newest `keep` artifacts, the live one and the last `keep_promoted`
+promoted ones (rollback targets); everything else is deleted.
+
+The index is read-modify-written under an exclusive lock on <root>/.lock
+(fcntl, or an O_EXCL lock file where fcntl is missing), so the trainer and
+several gunicorn workers can share one store. Used by
+app.save_pipeline_atomic() and utils/improved_train.py.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines
+    fcntl = None
+
+DEFAULT_KEEP = 5
+DEFAULT_KEEP_PROMOTED = 3
+LOCK_STALE_S = 60      # O_EXCL fallback: a lock file older than this is from a dead process
+
+
+class _HashingWriter:
+    """File-like sink for pickle.dump that hashes bytes as they are written."""
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._f.write(data)
+
+
+class ArtifactStore:
+    def __init__(self, root, keep=DEFAULT_KEEP, keep_promoted=DEFAULT_KEEP_PROMOTED):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.lock_path = self.root / ".lock"
+        self.keep = keep
+        self.keep_promoted = keep_promoted
+        self._thread_lock = threading.Lock()
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+    # ---------------------------
+    # Index
+    # ---------------------------
+    @contextmanager
+    def _lock(self):
+        """Exclusive across threads and processes for an index read-modify-write."""
+        with self._thread_lock:
+            if fcntl is not None:
+                with open(self.lock_path, "a") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+                return
+            while True:
+                try:
+                    fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - os.stat(self.lock_path).st_mtime > LOCK_STALE_S:
+                            os.remove(self.lock_path)
+                    except OSError:
+                        pass
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                os.close(fd)
+                os.remove(self.lock_path)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"artifacts": {}, "promotions": []}
+
+    def _save_index(self, index):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def object_path(self, digest):
+        return self.objects / f"{digest}.pkl"
+
+    # ---------------------------
+    # Write
+    # ---------------------------
+    def _write_object(self, write):
+        """Run write(sink) into a temp file, then file it under its hash; returns (digest, size)."""
+        fd, tmp = tempfile.mkstemp(dir=self.objects, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer = _HashingWriter(f)
+                write(writer)
+            digest = writer.sha256.hexdigest()
+            final = self.object_path(digest)
+            if final.exists():
+                os.remove(tmp)
+            else:
+                os.replace(tmp, final)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return digest, writer.size
+
+    def _record(self, digest, size, meta=None, saved_at=None, replace_meta=True):
+        now = saved_at or datetime.utcnow().isoformat() + "Z"
+        with self._lock():
+            index = self._load_index()
+            entry = index["artifacts"].get(digest)
+            if entry is None:
+                entry = {"size_bytes": size, "created_at": now, "promoted": False}
+                index["artifacts"][digest] = entry
+            entry["last_saved_at"] = max(entry.get("last_saved_at", now), now)
+            if meta and (replace_meta or "meta" not in entry):
+                entry["meta"] = meta
+            self._save_index(index)
+        return digest
+
+    def put(self, obj, meta=None):
+        """Pickle obj into the store; returns its sha256. Identical bytes are stored once."""
+        digest, size = self._write_object(lambda sink: pickle.dump(obj, sink))
+        return self._record(digest, size, meta=meta)
+
+    def put_file(self, path, meta=None, saved_at=None):
+        """Copy an existing pickle file into the store (streamed, never unpickled)."""
+        def _copy(sink):
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, sink)
+        digest, size = self._write_object(_copy)
+        # Imported copies only label artifacts the store didn't know about
+        return self._record(digest, size, meta=meta, saved_at=saved_at, replace_meta=False)
+
+    def adopt(self, live_path, meta=None):
+        """Make sure the file currently at live_path is stored and recorded as live.
+
+        A model deployed before the store existed (or copied in by hand) is
+        otherwise replaced by the next promote and lost as a rollback target.
+        Returns the live file's hash, or None if there is no file.
+        """
+        live_path = Path(live_path)
+        if not live_path.exists():
+            return None
+        current = self.current()
+        if current and self.object_path(current).exists() and os.path.samefile(
+                live_path, self.object_path(current)):
+            return current   # hard link to the recorded live artifact: nothing to do
+        digest = self.put_file(live_path, meta=meta or {"source": "adopted live file"})
+        # Re-point the live path at the stored object (same bytes) so later checks are a stat
+        self.materialize(digest, live_path)
+        with self._lock():
+            index = self._load_index()
+            promotions = index["promotions"]
+            if not promotions or promotions[-1]["hash"] != digest:
+                index["artifacts"][digest]["promoted"] = True
+                promotions.append({
+                    "hash": digest, "promoted_at": datetime.utcnow().isoformat() + "Z"
+                })
+                self._save_index(index)
+        return digest
+
+    def import_legacy_backups(self, directory):
+        """Move timestamped copies from the old model/backups/ into the store.
+
+        They become promotion history older than anything already recorded,
+        in file-mtime order; each file is removed once its bytes are stored,
+        then retention applies as usual. Returns the imported hashes.
+        """
+        directory = Path(directory)
+        if not directory.is_dir():
+            return []
+        files = sorted(directory.glob("*.pkl"), key=lambda p: p.stat().st_mtime)
+        imported = []
+        for path in files:
+            when = datetime.utcfromtimestamp(path.stat().st_mtime).isoformat() + "Z"
+            digest = self.put_file(path, meta={"source": f"backups/{path.name}"}, saved_at=when)
+            imported.append((digest, when))
+            os.remove(path)
+        if imported:
+            with self._lock():
+                index = self._load_index()
+                for digest, _ in imported:
+                    index["artifacts"][digest]["promoted"] = True
+                index["promotions"][:0] = [{"hash": d, "promoted_at": w} for d, w in imported]
+                self._save_index(index)
+            self.prune()
+        try:
+            directory.rmdir()
+        except OSError:
+            pass   # something other than backups left in there; leave it alone
+        return [d for d, _ in imported]
+
+    def materialize(self, digest, path):
+        """Atomically point `path` at an object (hard link if possible, else copy)."""
+        path = Path(path)
+        src = self.object_path(digest)
+        if not src.exists():
+            raise KeyError(f"Unknown artifact {digest}")
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".pkl")
+        os.close(fd)
+        os.remove(tmp)
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, path)
+
+    def promote(self, digest, live_path=None):
+        """Record an artifact as served (a rollback target) and optionally materialize it.
+
+        An untracked file at live_path is adopted first, so it stays available
+        as the rollback target.
+        """
+        if live_path is not None:
+            self.adopt(live_path)
+        with self._lock():
+            index = self._load_index()
+            if digest not in index["artifacts"]:
+                raise KeyError(f"Unknown artifact {digest}")
+            if live_path is not None:
+                self.materialize(digest, live_path)
+            index["artifacts"][digest]["promoted"] = True
+            index["promotions"].append({
+                "hash": digest, "promoted_at": datetime.utcnow().isoformat() + "Z"
+            })
+            self._save_index(index)
+
+    def save(self, obj, live_path, meta=None):
+        """put + promote + prune: the usual 'this is the new live model' path."""
+        digest = self.put(obj, meta=meta)
+        self.promote(digest, live_path=live_path)
+        self.prune()
+        return digest
+
+    # ---------------------------
+    # Read / rollback / retention
+    # ---------------------------
+    def current(self):
+        promotions = self._load_index()["promotions"]
+        return promotions[-1]["hash"] if promotions else None
+
+    def get(self, digest):
+        return self._load_index()["artifacts"].get(digest)
+
+    def list(self):
+        index = self._load_index()
+        live = index["promotions"][-1]["hash"] if index["promotions"] else None
+        items = [dict(v, hash=k, live=(k == live)) for k, v in index["artifacts"].items()]
+        return sorted(items, key=lambda a: a.get("last_saved_at", a["created_at"]), reverse=True)
+
+    def previous(self):
+        """Most recently promoted artifact other than the current one, if any."""
+        promotions = self._load_index()["promotions"]
+        if not promotions:
+            return None
+        live = promotions[-1]["hash"]
+        for p in reversed(promotions[:-1]):
+            if p["hash"] != live and self.object_path(p["hash"]).exists():
+                return p["hash"]
+        return None
+
+    def prune(self, keep=None, keep_promoted=None):
+        """Delete everything but the newest `keep`, the live and the last `keep_promoted` promoted.
+
+        Promotion history is trimmed to the artifacts that still exist.
+        """
+        keep = self.keep if keep is None else keep
+        keep_promoted = self.keep_promoted if keep_promoted is None else keep_promoted
+        removed = []
+        with self._lock():
+            index = self._load_index()
+            protected = []
+            for p in reversed(index["promotions"]):
+                if p["hash"] not in protected:
+                    protected.append(p["hash"])
+            # The live artifact always survives, even with keep_promoted=0
+            protected = set(protected[:max(1, keep_promoted)])
+            ordered = sorted(
+                index["artifacts"].items(),
+                key=lambda kv: kv[1].get("last_saved_at", kv[1]["created_at"]),
+                reverse=True,
+            )
+            for i, (digest, entry) in enumerate(ordered):
+                if i < keep or digest in protected:
+                    continue
+                try:
+                    os.remove(self.object_path(digest))
+                except FileNotFoundError:
+                    pass
+                del index["artifacts"][digest]
+                removed.append(digest)
+            if removed:
+                index["promotions"] = [
+                    p for p in index["promotions"] if p["hash"] in index["artifacts"]
+                ]
+                self._save_index(index)
+        return removed
+
+    def disk_usage(self):
+        return sum(p.stat().st_size for p in self.objects.glob("*.pkl"))
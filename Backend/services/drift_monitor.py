@@ -0,0 +1,208 @@
+# Backend/services/drift_monitor.py
+"""
+Streaming feature-drift monitor for live /predict traffic.
+
+Keeps a fixed array of bin counters per feature (bin edges come from the
+reference profile written by improved_train.eval_and_save_pipeline), so
+memory does not grow with traffic and observe() is a handful of bisects.
+Categorical values the reference never saw share one OTHER_CATEGORY bucket,
+so arbitrary client strings can't grow the counters.
+A timer thread closes a window every flush interval and writes the
+summaries to Mongo `retrain_logs`; flush() at exit writes the last one.
+"""
+
+import json
+import math
+import threading
+from bisect import bisect_right
+from datetime import datetime
+
+PSI_EPSILON = 1e-4
+DRIFT_THRESHOLD = 0.2      # PSI above this is usually treated as significant drift
+FLUSH_INTERVAL_S = 300
+MAX_PENDING = 24           # unwritten summaries kept for retry while Mongo is down
+MIN_WINDOW_COUNT = 50      # don't score windows that are too small to mean anything
+OTHER_CATEGORY = "__other__"
+
+
+def psi(expected, actual):
+    """Population stability index between two aligned proportion lists."""
+    total = 0.0
+    for e, a in zip(expected, actual):
+        e = max(e, PSI_EPSILON)
+        a = max(a, PSI_EPSILON)
+        total += (a - e) * math.log(a / e)
+    return total
+
+
+class DriftMonitor:
+    def __init__(self, profile, features, collection_getter=None, logger=None,
+                 flush_interval=FLUSH_INTERVAL_S):
+        self.profile = profile
+        self.reference = {f: profile["features"][f] for f in features if f in profile["features"]}
+        self.reference_approval_rate = profile.get("approval_rate")
+        self._collection_getter = collection_getter
+        self._logger = logger
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer = None
+        self._pending = []
+        self._reset_window()
+        self._totals = self._empty_counts()
+        self._total_n = 0
+        self._total_approved = 0
+
+    @classmethod
+    def from_metadata(cls, meta_path, features, **kwargs):
+        """Build a monitor from the pipeline metadata JSON; None if it has no profile."""
+        try:
+            with open(meta_path) as f:
+                profile = json.load(f).get("reference_profile")
+        except (OSError, ValueError):
+            return None
+        if not profile:
+            return None
+        return cls(profile, features, **kwargs)
+
+    # ---------------------------
+    # Hot path
+    # ---------------------------
+    def observe(self, row, approved):
+        """Record one prediction. Never raises into the request path."""
+        try:
+            with self._lock:
+                for name, ref in self.reference.items():
+                    value = row.get(name)
+                    if value is None:
+                        continue
+                    if ref["type"] == "numeric":
+                        idx = bisect_right(ref["edges"], float(value))
+                        self._window[name][idx] += 1
+                        self._totals[name][idx] += 1
+                    else:
+                        key = str(value)
+                        if key not in ref["proportions"]:
+                            key = OTHER_CATEGORY
+                        self._window[name][key] = self._window[name].get(key, 0) + 1
+                        self._totals[name][key] = self._totals[name].get(key, 0) + 1
+                self._window_n += 1
+                self._total_n += 1
+                if approved:
+                    self._window_approved += 1
+                    self._total_approved += 1
+        except Exception as e:
+            if self._logger:
+                self._logger.warning(f"Drift monitor observe failed: {e}")
+
+    # ---------------------------
+    # Scoring
+    # ---------------------------
+    def scores(self, window=False):
+        """PSI per feature plus approval-rate delta, for the window or since startup."""
+        with self._lock:
+            counts = self._window if window else self._totals
+            n = self._window_n if window else self._total_n
+            approved = self._window_approved if window else self._total_approved
+            return self._score(counts, n, approved)
+
+    def _score(self, counts, n, approved):
+        features = {}
+        for name, ref in self.reference.items():
+            c = counts[name]
+            if ref["type"] == "numeric":
+                total = sum(c)
+                actual = [v / total for v in c] if total else [0.0] * len(c)
+                expected = ref["proportions"]
+            else:
+                total = sum(c.values())
+                keys = sorted(ref["proportions"]) + [OTHER_CATEGORY]
+                expected = [ref["proportions"].get(k, 0.0) for k in keys]
+                actual = [c.get(k, 0) / total for k in keys] if total else [0.0] * len(keys)
+            value = psi(expected, actual) if total >= MIN_WINDOW_COUNT else None
+            features[name] = {
+                "psi": round(value, 6) if value is not None else None,
+                "drift": value is not None and value > DRIFT_THRESHOLD,
+                "count": total,
+            }
+        approval_rate = approved / n if n else None
+        return {
+            "count": n,
+            "approval_rate": approval_rate,
+            "reference_approval_rate": self.reference_approval_rate,
+            "approval_rate_delta": (
+                approval_rate - self.reference_approval_rate
+                if approval_rate is not None and self.reference_approval_rate is not None
+                else None
+            ),
+            "features": features,
+            "drifted_features": [f for f, s in features.items() if s["drift"]],
+        }
+
+    # ---------------------------
+    # Windows & flushing
+    # ---------------------------
+    def _empty_counts(self):
+        return {
+            name: ([0] * (len(ref["edges"]) + 1) if ref["type"] == "numeric" else {})
+            for name, ref in self.reference.items()
+        }
+
+    def _reset_window(self):
+        self._window = self._empty_counts()
+        self._window_n = 0
+        self._window_approved = 0
+        self._window_started_at = datetime.utcnow().isoformat() + "Z"
+
+    def _close_window(self):
+        # Called with the lock held
+        if self._window_n:
+            summary = self._score(self._window, self._window_n, self._window_approved)
+            summary.update({
+                "kind": "drift",
+                "window_start": self._window_started_at,
+                "saved_at": datetime.utcnow().isoformat() + "Z",
+            })
+            self._pending.append(summary)
+            del self._pending[:-MAX_PENDING]
+        self._reset_window()
+
+    def start(self):
+        """Close and write a window every flush_interval from a daemon thread."""
+        if self._timer is None:
+            self._timer = threading.Thread(target=self._run, name="drift-flush", daemon=True)
+            self._timer.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Close the current window and write everything pending synchronously."""
+        with self._lock:
+            self._close_window()
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not self._write(batch):
+                with self._lock:
+                    self._pending[:0] = batch
+                    del self._pending[:-MAX_PENDING]
+
+    def _write(self, batch):
+        """True if the batch was written (or there was nothing/nowhere to write)."""
+        if not batch or self._collection_getter is None:
+            return True
+        try:
+            self._collection_getter().insert_many(batch)
+            return True
+        except Exception as e:
+            if self._logger:
+                self._logger.warning(f"Drift summary flush failed: {e}")
+            return False
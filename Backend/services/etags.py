@@ -0,0 +1,47 @@
+# Backend/services/etags.py
+"""
+Write counters for cheap conditional GETs.
+
+Writers bump a small counter document per scope (e.g. one user's loans);
+readers fetch the counters for the scopes a response depends on in one
+query and hash them into an ETag, so an unchanged poll can be answered with
+304 without reading the result set.
+"""
+
+import hashlib
+import time
+
+VERSION_COLLECTION = "write_versions"
+GLOBAL_LOANS_SCOPE = "loans:global"   # bumped by bulk writers that bypass the API
+BUMP_ATTEMPTS = 3
+BUMP_BACKOFF_S = 0.05
+
+
+def user_loans_scope(user_id):
+    return f"loans:user:{user_id}"
+
+
+def bump(db, *scopes, attempts=BUMP_ATTEMPTS):
+    """Increment each scope's counter, retrying transient errors; re-raises the last one.
+
+    A lost bump leaves readers on a stale 304 until the next write, so callers
+    must not swallow the exception.
+    """
+    for scope in scopes:
+        for attempt in range(attempts):
+            try:
+                db[VERSION_COLLECTION].update_one({"_id": scope}, {"$inc": {"v": 1}}, upsert=True)
+                break
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(BUMP_BACKOFF_S * (2 ** attempt))
+
+
+def versions(db, scopes):
+    found = {d["_id"]: d.get("v", 0) for d in db[VERSION_COLLECTION].find({"_id": {"$in": list(scopes)}})}
+    return [found.get(s, 0) for s in scopes]
+
+
+def make_etag(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
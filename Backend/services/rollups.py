@@ -0,0 +1,237 @@
+# Backend/services/rollups.py
+"""
+Incrementally maintained rollups of the `loans` collection for the admin dashboard.
+
+Every insert bumps three small documents in `loan_rollups` with one
+bulk_write: the global totals, the day bucket and the status bucket. Reading
+a dashboard is then a handful of _id lookups, however large `loans` grows.
+rebuild_rollups() recomputes everything with one aggregation (for backfills
+or after bulk seeding) into a scratch collection and swaps it in with an
+atomic rename, replaying loans the API inserted while it ran.
+
+Keys are bounded: statuses fold into KNOWN_STATUSES + "Other", and days come
+from a server-side parse of created_at ("unknown" if it doesn't parse), so a
+client can't mint new rollup documents or field names.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+ROLLUP_COLLECTION = "loan_rollups"
+REBUILD_COLLECTION = "loan_rollups_rebuild"
+SCORE_BUCKET = 50          # cibil_score histogram bucket width
+KNOWN_STATUSES = ("Approved", "Rejected", "Pending")
+OTHER_STATUS = "Other"
+
+
+def _score_bucket(score):
+    try:
+        return str(int(float(score) // SCORE_BUCKET * SCORE_BUCKET))
+    except (TypeError, ValueError):
+        return "unknown"
+
+
+def parse_created_at(value):
+    """Naive-UTC datetime from a datetime or ISO-8601 string; None if it doesn't parse."""
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        text = str(value or "").strip()
+        if text.endswith(("Z", "z")):
+            text = text[:-1] + "+00:00"
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def normalize_created_at(value):
+    """ISO string ("...Z") the API stores for created_at, or None if value is unusable."""
+    dt = parse_created_at(value)
+    return dt.isoformat() + "Z" if dt is not None else None
+
+
+def _day(created_at):
+    dt = parse_created_at(created_at)
+    return dt.date().isoformat() if dt is not None else "unknown"
+
+
+def _status_key(status):
+    text = str(status or "").strip().lower()
+    for known in KNOWN_STATUSES:
+        if text == known.lower():
+            return known
+    return OTHER_STATUS
+
+
+def rollup_ops(loan):
+    """UpdateOne upserts that fold a single loan document into the rollups."""
+    status = _status_key(loan.get("status"))
+    day = _day(loan.get("created_at"))
+    inc = {
+        "total": 1,
+        "sum_loan_amount": float(loan.get("loan_amount") or 0),
+        "sum_cibil_score": float(loan.get("cibil_score") or 0),
+        f"score_hist.{_score_bucket(loan.get('cibil_score'))}": 1,
+    }
+    with_status = dict(inc, **{f"by_status.{status}": 1})
+    return [
+        UpdateOne({"_id": "global"}, {"$inc": with_status}, upsert=True),
+        UpdateOne({"_id": f"day:{day}"}, {"$inc": with_status, "$set": {"day": day}}, upsert=True),
+        UpdateOne({"_id": f"status:{status}"}, {"$inc": inc, "$set": {"status": status}}, upsert=True),
+    ]
+
+
+def record_loan(db, loan):
+    db[ROLLUP_COLLECTION].bulk_write(rollup_ops(loan), ordered=False)
+
+
+def _summarize(doc):
+    if not doc:
+        return None
+    doc = dict(doc)
+    total = doc.get("total", 0)
+    by_status = doc.get("by_status", {})
+    doc["avg_loan_amount"] = doc.get("sum_loan_amount", 0) / total if total else 0.0
+    doc["avg_cibil_score"] = doc.get("sum_cibil_score", 0) / total if total else 0.0
+    if by_status:
+        doc["approval_rate"] = round(by_status.get("Approved", 0) / total * 100.0, 2) if total else 0.0
+    return doc
+
+
+STATUS_IDS = [f"status:{s}" for s in KNOWN_STATUSES + (OTHER_STATUS,)]
+
+
+def read_rollups(db, days=()):
+    """Global + per-status rollups and the requested day buckets, by _id lookup only."""
+    coll = db[ROLLUP_COLLECTION]
+    day_ids = [f"day:{d}" for d in days]
+    by_day = {d["_id"]: d for d in coll.find({"_id": {"$in": day_ids}})} if day_ids else {}
+    return {
+        "global": _summarize(coll.find_one({"_id": "global"})),
+        "by_status": [_summarize(d) for d in coll.find({"_id": {"$in": STATUS_IDS}})],
+        "by_day": [
+            _summarize(by_day.get(i)) or {"_id": i, "day": i[4:], "total": 0}
+            for i in day_ids
+        ],
+    }
+
+
+def fold_groups(rows):
+    """Rollup documents from ($group) rows of {_id: {day, status, bucket}, n, amount, cibil}.
+
+    Day and status are normalized here with the same helpers rollup_ops
+    uses, so a rebuild matches what incremental updates would have produced.
+    """
+    docs = defaultdict(lambda: {
+        "total": 0, "sum_loan_amount": 0.0, "sum_cibil_score": 0.0,
+        "score_hist": defaultdict(int),
+    })
+
+    def _add(key, row, status, bucket, track_status=True):
+        d = docs[key]
+        d["total"] += row["n"]
+        d["sum_loan_amount"] += float(row["amount"])
+        d["sum_cibil_score"] += float(row["cibil"])
+        d["score_hist"][bucket] += row["n"]
+        if track_status:
+            d.setdefault("by_status", defaultdict(int))[status] += row["n"]
+
+    for row in rows:
+        day = _day(row["_id"]["day"])
+        status = _status_key(row["_id"]["status"])
+        bucket = _score_bucket(row["_id"]["bucket"])
+        _add("global", row, status, bucket)
+        _add(f"day:{day}", row, status, bucket)
+        docs[f"day:{day}"]["day"] = day
+        _add(f"status:{status}", row, status, bucket, track_status=False)
+        docs[f"status:{status}"]["status"] = status
+
+    out = []
+    for _id, d in docs.items():
+        d["score_hist"] = dict(d["score_hist"])
+        if "by_status" in d:
+            d["by_status"] = dict(d["by_status"])
+        out.append({"_id": _id, **d})
+    return out
+
+
+def _replay_since(db, target, cutoff):
+    """Apply rollup_ops to `target` for loans the API inserted after `cutoff`.
+
+    Loops until a pass finds nothing new, so the window left for the caller
+    (between the last pass and the rename) is as short as possible.
+    """
+    replayed = []
+    while True:
+        query = {"inserted_at": {"$gt": cutoff}}
+        if replayed:
+            query["_id"] = {"$nin": replayed}
+        batch = list(db.loans.find(query))
+        if not batch:
+            return len(replayed)
+        ops = [op for loan in batch for op in rollup_ops(loan)]
+        target.bulk_write(ops, ordered=False)
+        replayed.extend(loan["_id"] for loan in batch)
+
+
+def rebuild_rollups(db, now=None):
+    """Recompute all rollup documents from `loans` and swap them in atomically.
+
+    Loans carrying an `inserted_at` later than the rebuild's start (set by
+    /api/loan/apply) are left out of the aggregation and replayed into the
+    new documents just before the swap, since their record_loan() $inc on
+    the old collection is discarded by the rename. Bulk writers that don't
+    set inserted_at (utils/seed_data.py) must not run concurrently, and a
+    loan that lands between the last replay pass and the rename is still
+    missed, so prefer quiet periods.
+    """
+    cutoff = now or datetime.utcnow()
+    pipeline = [
+        {"$match": {"$or": [
+            {"inserted_at": {"$exists": False}},
+            {"inserted_at": {"$lte": cutoff}},
+        ]}},
+        {"$group": {
+            "_id": {
+                # Date prefix of created_at (the API stores UTC "...Z" strings);
+                # fold_groups re-parses it and normalizes the raw status
+                "day": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": [{"$type": "$created_at"}, "string"]},
+                         "then": {"$substrBytes": ["$created_at", 0, 10]}},
+                        {"case": {"$eq": [{"$type": "$created_at"}, "date"]},
+                         "then": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}},
+                    ],
+                    "default": None,
+                }},
+                "status": {"$ifNull": ["$status", None]},
+                "bucket": {"$multiply": [
+                    {"$floor": {"$divide": [{"$ifNull": ["$cibil_score", 0]}, SCORE_BUCKET]}},
+                    SCORE_BUCKET,
+                ]},
+            },
+            "n": {"$sum": 1},
+            "amount": {"$sum": {"$ifNull": ["$loan_amount", 0]}},
+            "cibil": {"$sum": {"$ifNull": ["$cibil_score", 0]}},
+        }}
+    ]
+    out = fold_groups(db.loans.aggregate(pipeline, allowDiskUse=True))
+
+    # Build aside and rename over the live collection, so readers never see
+    # a half-empty or half-rebuilt rollup set
+    scratch = db[REBUILD_COLLECTION]
+    scratch.drop()
+    if out:
+        scratch.insert_many(out)
+    replayed = _replay_since(db, scratch, cutoff)
+    if not out and not replayed:
+        db[ROLLUP_COLLECTION].drop()
+        return 0
+    scratch.rename(ROLLUP_COLLECTION, dropTarget=True)
+    return db[ROLLUP_COLLECTION].count_documents({})
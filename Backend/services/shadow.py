@@ -0,0 +1,165 @@
+# Backend/services/shadow.py
+"""
+Shadow / canary evaluation of a candidate pipeline next to the live one.
+
+A sampled fraction of /predict inputs is mirrored to the candidate on a
+background executor, so the response path only pays for a random() call
+and a queue put. Optionally a canary percentage of requests is decided by
+the candidate instead, with the live model scored in the background.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+MAX_PENDING = 256   # mirrored requests waiting for the executor; beyond this we drop
+
+
+class _LatencyStats:
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 4) if self.count else None,
+            "max_ms": round(self.max_ms, 4),
+        }
+
+
+def timed_predict(pipeline, input_df):
+    start = time.perf_counter()
+    pred = pipeline.predict(input_df)[0]
+    return pred, (time.perf_counter() - start) * 1000.0
+
+
+class ShadowEvaluator:
+    def __init__(self, candidate, candidate_path=None, sample_rate=0.1,
+                 canary_percent=0.0, logger=None, max_pending=MAX_PENDING):
+        self.candidate = candidate
+        self.candidate_path = str(candidate_path) if candidate_path else None
+        self.sample_rate = float(sample_rate)
+        self.canary_percent = float(canary_percent)
+        self.max_pending = max_pending
+        self._logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.loaded_at = datetime.utcnow().isoformat() + "Z"
+
+        self.mirrored = 0
+        self.dropped = 0
+        self.agreements = 0
+        self.canary_served = 0
+        self.errors = 0
+        self.live_latency = _LatencyStats()
+        self.candidate_latency = _LatencyStats()
+
+    # ---------------------------
+    # Request path
+    # ---------------------------
+    def use_canary(self):
+        return self.canary_percent > 0 and random.random() * 100.0 < self.canary_percent
+
+    def predict(self, live, input_df):
+        """Return the raw prediction that decides this request.
+
+        Canary requests are answered by the candidate (falling back to the
+        live model if it raises) and the live model is scored in the
+        background; everything else is answered by the live model and (if
+        sampled) mirrored to the candidate.
+        """
+        if self.use_canary():
+            try:
+                pred, ms = timed_predict(self.candidate, input_df)
+            except Exception as e:
+                # A broken candidate must never fail a real request
+                with self._lock:
+                    self.errors += 1
+                if self._logger:
+                    self._logger.warning(f"Canary prediction failed, using live model: {e}")
+                return live.predict(input_df)[0]
+            with self._lock:
+                self.canary_served += 1
+            self._submit(live, input_df, pred, ms, served_by_candidate=True)
+            return pred
+
+        pred, ms = timed_predict(live, input_df)
+        if random.random() < self.sample_rate:
+            self._submit(self.candidate, input_df, pred, ms, served_by_candidate=False)
+        return pred
+
+    def _submit(self, other, input_df, served_pred, served_ms, served_by_candidate):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending += 1
+        try:
+            self._executor.submit(self._compare, other, input_df, served_pred,
+                                  served_ms, served_by_candidate)
+        except RuntimeError:
+            # Executor shut down (candidate being replaced)
+            with self._lock:
+                self._pending -= 1
+                self.dropped += 1
+
+    # ---------------------------
+    # Background
+    # ---------------------------
+    def _compare(self, other, input_df, served_pred, served_ms, served_by_candidate):
+        try:
+            other_pred, other_ms = timed_predict(other, input_df)
+        except Exception as e:
+            with self._lock:
+                self._pending -= 1
+                self.errors += 1
+            if self._logger:
+                self._logger.warning(f"Shadow prediction failed: {e}")
+            return
+
+        if served_by_candidate:
+            candidate_ms, live_ms = served_ms, other_ms
+        else:
+            live_ms, candidate_ms = served_ms, other_ms
+        with self._lock:
+            self._pending -= 1
+            self.mirrored += 1
+            if other_pred == served_pred:
+                self.agreements += 1
+            self.live_latency.add(live_ms)
+            self.candidate_latency.add(candidate_ms)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "candidate_path": self.candidate_path,
+                "loaded_at": self.loaded_at,
+                "sample_rate": self.sample_rate,
+                "canary_percent": self.canary_percent,
+                "compared": self.mirrored,
+                "agreement_rate": (
+                    round(self.agreements / self.mirrored, 6) if self.mirrored else None
+                ),
+                "canary_served": self.canary_served,
+                "pending": self._pending,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "live_latency": self.live_latency.as_dict(),
+                "candidate_latency": self.candidate_latency.as_dict(),
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Tests import Backend modules the same way app.py does (Backend/ on sys.path)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests that import app.py: it connects to Mongo lazily and nothing here talks to it
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:1/loanpredictor_test")
+os.environ.setdefault("ADMISSION_CONTROL", "0")
+# Tests drive app.sync_worker_state() themselves; keep the background loop out of the way
+os.environ.setdefault("WORKER_SYNC_INTERVAL_S", "3600")
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from services.admission import (
+    AdmissionController, Policy, TokenBuckets, DEFAULT_POLICIES, queue_age_s
+)
+
+
+def test_token_bucket_allows_burst_then_reports_wait():
+    buckets = TokenBuckets()
+    assert all(buckets.take("k", rate=1.0, burst=3, now=0.0) == 0.0 for _ in range(3))
+    assert buckets.take("k", rate=1.0, burst=3, now=0.0) == 1.0
+    # Half a second refills half a token
+    assert buckets.take("k", rate=1.0, burst=3, now=0.5) == 0.5
+    assert buckets.take("k", rate=1.0, burst=3, now=1.5) == 0.0
+
+
+def test_token_bucket_evicts_least_recently_used():
+    buckets = TokenBuckets(max_keys=2)
+    buckets.take("a", 1.0, 1, now=0.0)
+    buckets.take("b", 1.0, 1, now=0.0)
+    buckets.take("a", 1.0, 1, now=0.0)   # touch a, so b is oldest
+    buckets.take("c", 1.0, 1, now=0.0)
+    assert len(buckets) == 2
+    # b was evicted and comes back with a full bucket
+    assert buckets.take("b", 1.0, 1, now=0.0) == 0.0
+    assert buckets.take("c", 1.0, 1, now=0.0) > 0
+
+
+def test_default_predict_cap_leaves_room_for_authenticated_callers():
+    ctl = AdmissionController()
+    predict = ctl.pools["predict"]
+    assert predict.low_priority_limit < predict.policy.max_concurrent
+
+
+def test_low_priority_capped_but_authenticated_admitted():
+    ctl = AdmissionController(
+        {"p": Policy(max_concurrent=4, max_queue=0, budget_s=1.0, rate=100, burst=100)},
+        low_priority_share=0.5,
+    )
+    assert ctl.acquire("p", high_priority=False) is None
+    assert ctl.acquire("p", high_priority=False) is None
+    assert ctl.acquire("p", high_priority=False) == "queue_full"
+    assert ctl.acquire("p", high_priority=True) is None
+    ctl.release("p", False, 0.01)
+    assert ctl.acquire("p", high_priority=False) is None
+
+
+def test_anonymous_predict_saturation_does_not_shed_auth():
+    ctl = AdmissionController()
+    predict = ctl.pools["predict"]
+    held = 0
+    while ctl.acquire("predict", high_priority=False) is None:
+        held += 1
+        if held > predict.policy.max_concurrent:
+            break
+    assert held == predict.low_priority_limit
+    start = time.monotonic()
+    for _ in range(ctl.pools["auth"].policy.max_concurrent):
+        assert ctl.acquire("auth", high_priority=False) is None
+    assert time.monotonic() - start < 0.1
+
+
+def test_waiter_admitted_when_slot_frees():
+    ctl = AdmissionController(
+        {"p": Policy(max_concurrent=1, max_queue=4, budget_s=2.0, rate=100, burst=100)}
+    )
+    assert ctl.acquire("p", True) is None
+    result = []
+    t = threading.Thread(target=lambda: result.append(ctl.acquire("p", True)))
+    t.start()
+    time.sleep(0.05)
+    assert ctl.stats()["pools"]["p"]["queued"] == 1
+    ctl.release("p", True, 0.05)
+    t.join(1.0)
+    assert result == [None]
+
+
+def test_sheds_on_latency_budget_and_timeout():
+    ctl = AdmissionController(
+        {"p": Policy(max_concurrent=1, max_queue=4, budget_s=0.05, rate=100, burst=100)}
+    )
+    assert ctl.acquire("p", True) is None
+    assert ctl.acquire("p", True) == "timeout"
+    # Service time now known to exceed the budget: shed without waiting
+    ctl.release("p", True, 1.0)
+    assert ctl.acquire("p", True) is None
+    assert ctl.acquire("p", True) == "latency_budget"
+    shed = ctl.stats()["pools"]["p"]["shed"]
+    assert shed["timeout"] == 1 and shed["latency_budget"] == 1
+
+
+def test_sheds_requests_that_already_queued_upstream():
+    ctl = AdmissionController(
+        {"p": Policy(max_concurrent=1, max_queue=4, budget_s=1.0, rate=100, burst=100)}
+    )
+    assert ctl.acquire("p", True, queued_s=1.5) == "queue_time"
+    assert ctl.acquire("p", True, queued_s=0.2) is None
+
+
+def test_queue_age_accepts_common_units():
+    now = 1_700_000_010.0
+    assert queue_age_s("t=1700000009.5", now=now) == 0.5
+    assert abs(queue_age_s("t=1700000009500", now=now) - 0.5) < 1e-6
+    assert abs(queue_age_s("1700000009500000", now=now) - 0.5) < 1e-6
+    assert queue_age_s(None) is None
+    assert queue_age_s("t=garbage") is None
@@ -0,0 +1,116 @@
+import multiprocessing
+
+from services.artifact_store import ArtifactStore
+
+
+def _save_many(root, start, n):
+    store = ArtifactStore(root, keep=100)
+    for i in range(start, start + n):
+        store.put({"model": i})
+
+
+def test_save_is_deduplicated(tmp_path):
+    store = ArtifactStore(tmp_path / "store")
+    live = tmp_path / "live.pkl"
+    a = store.save({"model": 1}, live)
+    b = store.save({"model": 1}, live)
+    assert a == b
+    assert len(store.list()) == 1
+    assert live.read_bytes() == store.object_path(a).read_bytes()
+
+
+def test_retention_is_bounded_even_though_every_save_promotes(tmp_path):
+    store = ArtifactStore(tmp_path / "store", keep=2, keep_promoted=2)
+    live = tmp_path / "live.pkl"
+    digests = [store.save({"model": i}, live) for i in range(6)]
+    kept = {a["hash"] for a in store.list()}
+    assert kept == set(digests[-2:])
+    assert len(list(store.objects.glob("*.pkl"))) == 2
+    assert store.current() == digests[-1]
+
+
+def test_promoted_rollback_targets_outlive_newer_unpromoted(tmp_path):
+    store = ArtifactStore(tmp_path / "store", keep=1, keep_promoted=2)
+    live = tmp_path / "live.pkl"
+    first = store.save({"model": "a"}, live)
+    second = store.save({"model": "b"}, live)
+    candidates = [store.put({"candidate": i}) for i in range(3)]
+    store.prune()
+    kept = {a["hash"] for a in store.list()}
+    assert kept == {first, second, candidates[-1]}
+
+
+def test_previous_and_rollback(tmp_path):
+    store = ArtifactStore(tmp_path / "store")
+    live = tmp_path / "live.pkl"
+    first = store.save({"model": "a"}, live)
+    second = store.save({"model": "b"}, live)
+    assert store.current() == second
+    assert store.previous() == first
+    store.promote(first, live_path=live)
+    assert store.current() == first
+    assert store.previous() == second
+    assert live.read_bytes() == store.object_path(first).read_bytes()
+
+
+def test_previous_skips_pruned_artifacts(tmp_path):
+    store = ArtifactStore(tmp_path / "store", keep=1, keep_promoted=1)
+    live = tmp_path / "live.pkl"
+    store.save({"model": "a"}, live)
+    store.save({"model": "b"}, live)
+    assert store.previous() is None
+
+
+def test_index_writes_from_several_processes_are_not_lost(tmp_path):
+    root = tmp_path / "store"
+    ArtifactStore(root)
+    procs = [multiprocessing.Process(target=_save_many, args=(root, i * 20, 20)) for i in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert len(ArtifactStore(root).list()) == 60
+
+
+def test_untracked_live_file_survives_first_save(tmp_path):
+    store = ArtifactStore(tmp_path / "store", keep=1, keep_promoted=2)
+    live = tmp_path / "live.pkl"
+    live.write_bytes(b"model deployed before the store existed")
+    original = live.read_bytes()
+
+    new = store.save({"model": "retrained"}, live)
+    assert store.current() == new
+    old = store.previous()
+    assert old is not None
+    assert store.object_path(old).read_bytes() == original
+
+    store.promote(old, live_path=live)
+    assert live.read_bytes() == original
+
+
+def test_adopt_is_idempotent(tmp_path):
+    store = ArtifactStore(tmp_path / "store")
+    live = tmp_path / "live.pkl"
+    live.write_bytes(b"live")
+    first = store.adopt(live)
+    assert store.adopt(live) == first
+    assert [p["hash"] for p in store._load_index()["promotions"]] == [first]
+
+
+def test_legacy_backups_are_imported_as_history(tmp_path):
+    import os
+    backups = tmp_path / "backups"
+    backups.mkdir()
+    for i, name in enumerate(["loan_pipeline_a.pkl", "loan_pipeline_b.pkl"]):
+        (backups / name).write_bytes(name.encode())
+        os.utime(backups / name, (1_600_000_000 + i, 1_600_000_000 + i))
+    store = ArtifactStore(tmp_path / "store", keep=5, keep_promoted=5)
+    live = tmp_path / "live.pkl"
+    current = store.save({"model": "now"}, live)
+
+    imported = store.import_legacy_backups(backups)
+    assert len(imported) == 2
+    assert not backups.exists()
+    assert store.current() == current
+    assert store.previous() == imported[-1]
+    assert store.object_path(imported[0]).read_bytes() == b"loan_pipeline_a.pkl"
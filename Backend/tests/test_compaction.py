@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.model_selection import train_test_split
+
+from utils import improved_train as it
+
+MAX_LOSS = 0.02
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    n = 600
+    X = pd.DataFrame({
+        "income_annum": rng.normal(5e6, 1e6, n),
+        "cibil_score": rng.integers(300, 900, n).astype(float),
+        "loan_amount": rng.normal(1e7, 3e6, n),
+        "education": rng.choice(["Graduate", "Not Graduate"], n),
+    })
+    y = ((X["cibil_score"] > 600) & (X["loan_amount"] < 2.2 * X["income_annum"])).astype(int)
+    return train_test_split(X, y, test_size=0.25, random_state=0, stratify=y)
+
+
+def _fitted(X_train, y_train):
+    pipe = it.build_pipeline(["income_annum", "cibil_score", "loan_amount"], ["education"],
+                             "randomforest", random_state=0, n_jobs=1)
+    return pipe.fit(X_train, y_train)
+
+
+def test_report_shape_and_floor(data):
+    X_train, X_test, y_train, y_test = data
+    pipe = _fitted(X_train, y_train)
+    served, report = it.compact_pipeline(pipe, X_train, y_train, X_test, y_test,
+                                         max_accuracy_loss=MAX_LOSS, random_state=0,
+                                         n_jobs=1, verbose=False)
+    for key in ("max_accuracy_loss", "chosen", "distilled", "test_accuracy_floor",
+                "rejected_after_refit", "before", "after", "candidates"):
+        assert key in report
+    assert set(report["after"]) == {"size_bytes", "latency_ms", "test_accuracy"}
+    assert report["after"]["test_accuracy"] >= report["before"]["test_accuracy"] - MAX_LOSS
+    if report["chosen"]:
+        assert report["after"]["size_bytes"] < report["before"]["size_bytes"]
+    else:
+        assert served is pipe
+
+
+def test_refit_winner_that_breaks_the_floor_is_not_served(data, monkeypatch):
+    X_train, X_test, y_train, y_test = data
+    pipe = _fitted(X_train, y_train)
+    fit = it._fit_candidate
+
+    def _sabotage_refit(candidate, teacher, X, y, random_state):
+        if len(X) == len(X_train):
+            # Final refit on all of X_train: learn noise instead of the labels
+            y = np.random.default_rng(1).permutation(np.asarray(y))
+        return fit(candidate, teacher, X, y, random_state)
+
+    monkeypatch.setattr(it, "_fit_candidate", _sabotage_refit)
+    served, report = it.compact_pipeline(pipe, X_train, y_train, X_test, y_test,
+                                         max_accuracy_loss=MAX_LOSS, random_state=0,
+                                         n_jobs=1, verbose=False)
+    assert served is pipe
+    assert report["chosen"] is None
+    assert report["rejected_after_refit"] is not None
+    assert report["after"] == report["before"]
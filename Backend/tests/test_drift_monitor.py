@@ -0,0 +1,96 @@
+import math
+
+import pytest
+
+from services.drift_monitor import DriftMonitor, psi, MIN_WINDOW_COUNT, OTHER_CATEGORY
+
+PROFILE = {
+    "approval_rate": 0.5,
+    "features": {
+        "cibil_score": {"type": "numeric", "edges": [500, 700], "proportions": [0.25, 0.5, 0.25]},
+        "education": {"type": "categorical", "proportions": {"Graduate": 0.5, "Not Graduate": 0.5}},
+    },
+}
+
+
+class FakeCollection:
+    def __init__(self, fail=False):
+        self.docs = []
+        self.fail = fail
+
+    def insert_many(self, docs):
+        if self.fail:
+            raise RuntimeError("mongo down")
+        self.docs.extend(docs)
+
+
+def _monitor(coll=None):
+    return DriftMonitor(PROFILE, ["cibil_score", "education", "missing"],
+                        collection_getter=(lambda: coll) if coll else None)
+
+
+def test_psi_zero_for_identical_and_positive_for_shift():
+    assert psi([0.25, 0.5, 0.25], [0.25, 0.5, 0.25]) == 0
+    shifted = psi([0.25, 0.5, 0.25], [0.0, 0.0, 1.0])
+    expected = sum((a - e) * math.log(a / e) for e, a in [(0.25, 1e-4), (0.5, 1e-4), (0.25, 1.0)])
+    assert shifted == pytest.approx(expected)
+
+
+def test_matching_traffic_has_no_drift():
+    m = _monitor()
+    for score, edu in [(400, "Graduate"), (600, "Not Graduate"), (650, "Graduate"), (800, "Not Graduate")] * 25:
+        m.observe({"cibil_score": score, "education": edu}, approved=score > 500)
+    s = m.scores()
+    assert s["count"] == 100
+    assert s["drifted_features"] == []
+    assert s["features"]["cibil_score"]["psi"] == pytest.approx(0, abs=1e-9)
+    assert s["approval_rate"] == 0.75
+    assert s["approval_rate_delta"] == pytest.approx(0.25)
+
+
+def test_shifted_traffic_is_flagged_and_small_windows_not_scored():
+    m = _monitor()
+    for _ in range(MIN_WINDOW_COUNT - 1):
+        m.observe({"cibil_score": 900, "education": "Graduate"}, True)
+    assert m.scores()["features"]["cibil_score"]["psi"] is None
+    m.observe({"cibil_score": 900, "education": "Graduate"}, True)
+    assert set(m.scores()["drifted_features"]) == {"cibil_score", "education"}
+
+
+def test_flush_closes_window_and_writes_summary():
+    coll = FakeCollection()
+    m = _monitor(coll)
+    m.observe({"cibil_score": 600, "education": "Graduate"}, True)
+    m.flush()
+    assert len(coll.docs) == 1 and coll.docs[0]["kind"] == "drift"
+    assert m.scores(window=True)["count"] == 0
+    assert m.scores()["count"] == 1          # totals survive window rotation
+    m.flush()                                # empty window writes nothing
+    assert len(coll.docs) == 1
+
+
+def test_failed_flush_is_retried():
+    coll = FakeCollection(fail=True)
+    m = _monitor(coll)
+    m.observe({"cibil_score": 600, "education": "Graduate"}, True)
+    m.flush()
+    assert coll.docs == []
+    coll.fail = False
+    m.flush()
+    assert len(coll.docs) == 1
+
+
+def test_observe_never_raises():
+    m = _monitor()
+    m.observe({"cibil_score": "not-a-number"}, True)
+    assert m.scores()["count"] == 0
+
+
+def test_unseen_categories_share_one_bucket():
+    m = _monitor()
+    for i in range(1000):
+        m.observe({"cibil_score": 600, "education": f"junk-{i}"}, approved=False)
+    assert set(m._window["education"]) == {OTHER_CATEGORY}
+    assert set(m._totals["education"]) == {OTHER_CATEGORY}
+    edu = m.scores()["features"]["education"]
+    assert edu["count"] == 1000 and edu["drift"]
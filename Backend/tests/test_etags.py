@@ -0,0 +1,48 @@
+import pytest
+
+from services import etags
+
+
+class FlakyCollection:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self.v = {}
+
+    def update_one(self, flt, update, upsert=False):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("transient")
+        self.v[flt["_id"]] = self.v.get(flt["_id"], 0) + update["$inc"]["v"]
+
+    def find(self, query):
+        return [{"_id": k, "v": v} for k, v in self.v.items() if k in query["_id"]["$in"]]
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(etags, "BUMP_BACKOFF_S", 0)
+
+
+def test_bump_retries_transient_errors():
+    coll = FlakyCollection(failures=etags.BUMP_ATTEMPTS - 1)
+    etags.bump({etags.VERSION_COLLECTION: coll}, "a")
+    assert coll.v == {"a": 1}
+    assert coll.calls == etags.BUMP_ATTEMPTS
+
+
+def test_bump_raises_after_last_attempt():
+    coll = FlakyCollection(failures=etags.BUMP_ATTEMPTS)
+    with pytest.raises(RuntimeError):
+        etags.bump({etags.VERSION_COLLECTION: coll}, "a")
+    assert coll.calls == etags.BUMP_ATTEMPTS
+
+
+def test_versions_default_to_zero_and_etag_changes_on_bump():
+    coll = FlakyCollection(failures=0)
+    db = {etags.VERSION_COLLECTION: coll}
+    before = etags.make_etag("x", *etags.versions(db, ["a", "b"]))
+    assert etags.versions(db, ["a", "b"]) == [0, 0]
+    etags.bump(db, "b")
+    assert etags.versions(db, ["a", "b"]) == [0, 1]
+    assert etags.make_etag("x", *etags.versions(db, ["a", "b"])) != before
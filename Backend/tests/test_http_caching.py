@@ -0,0 +1,109 @@
+import gzip
+
+import pytest
+
+pytest.importorskip("flask_jwt_extended")
+
+import app as app_module
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+
+flask_app = app_module.app
+ETAG = "test-etag"
+BIG = {"rows": [{"i": i, "text": "x" * 20} for i in range(200)]}
+
+
+def _tagged_view():
+    cached = app_module._not_modified(ETAG)
+    if cached is not None:
+        return cached
+    return app_module._tagged(jsonify(BIG), ETAG)
+
+
+if "_test_tagged" not in flask_app.view_functions:
+    flask_app.add_url_rule("/_test/tagged", "_test_tagged", _tagged_view)
+    flask_app.add_url_rule("/_test/small", "_test_small", lambda: jsonify({"ok": True}))
+
+
+@pytest.fixture
+def client():
+    return flask_app.test_client()
+
+
+def test_etag_round_trip_returns_304(client):
+    first = client.get("/_test/tagged")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    again = client.get("/_test/tagged", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert "Accept-Encoding" in again.headers["Vary"]
+
+
+def test_large_json_is_compressed_and_varies(client):
+    resp = client.get("/_test/tagged", headers={"Accept-Encoding": "gzip"})
+    if resp.headers.get("Content-Encoding") == "br":
+        pytest.skip("brotli preferred when installed")
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert gzip.decompress(resp.data).startswith(b"{")
+
+
+def test_vary_set_even_when_not_compressed(client):
+    plain = client.get("/_test/tagged", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+    small = client.get("/_test/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+
+class _Loans:
+    def __init__(self):
+        self.docs = []
+
+    def insert_one(self, doc):
+        doc["_id"] = len(self.docs) + 1
+        self.docs.append(doc)
+
+
+class _Mongo:
+    def __init__(self):
+        self.db = type("DB", (), {})()
+        self.db.loans = _Loans()
+
+
+def _apply(client):
+    with flask_app.app_context():
+        token = create_access_token(identity="user-1")
+    return client.post("/api/loan/apply", json={"loan_amount": 1000, "status": "Pending"},
+                       headers={"Authorization": f"Bearer {token}"})
+
+
+def test_loan_apply_rejected_before_write_if_bump_fails(client, monkeypatch):
+    fake = _Mongo()
+    monkeypatch.setattr(app_module, "mongo", fake)
+    monkeypatch.setattr(app_module, "record_loan", lambda db, doc: None)
+
+    def _fail(db, *scopes):
+        raise RuntimeError("mongo down")
+    monkeypatch.setattr(app_module, "bump", _fail)
+    resp = _apply(client)
+    assert resp.status_code == 503
+    assert fake.db.loans.docs == []
+
+
+def test_loan_apply_succeeds_if_only_post_insert_bump_fails(client, monkeypatch):
+    fake = _Mongo()
+    monkeypatch.setattr(app_module, "mongo", fake)
+    monkeypatch.setattr(app_module, "record_loan", lambda db, doc: None)
+    calls = []
+
+    def _bump(db, *scopes):
+        calls.append(scopes)
+        if len(calls) > 1:
+            raise RuntimeError("mongo down")
+    monkeypatch.setattr(app_module, "bump", _bump)
+    resp = _apply(client)
+    assert resp.status_code == 201
+    assert len(fake.db.loans.docs) == 1
+    assert len(calls) == 2
@@ -0,0 +1,69 @@
+import json
+import pickle
+
+import pytest
+
+pytest.importorskip("flask_jwt_extended")
+
+import app as app_module
+from flask_jwt_extended import create_access_token
+from services.artifact_store import ArtifactStore
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    store = ArtifactStore(tmp_path / "artifacts")
+    paths = {
+        "MODEL_PATH": tmp_path / "loan_pipeline.pkl",
+        "META_PATH": tmp_path / "loan_pipeline_meta.json",
+        "CANDIDATE_PATH": tmp_path / "loan_pipeline_candidate.pkl",
+        "CANDIDATE_META_PATH": tmp_path / "loan_pipeline_candidate_meta.json",
+        "SHADOW_CONFIG_PATH": tmp_path / "shadow_config.json",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(app_module, name, path)
+    monkeypatch.setattr(app_module, "artifact_store", store)
+    monkeypatch.setattr(app_module.User, "find_by_id", staticmethod(lambda _id: {"role": "admin"}))
+
+    live = store.save({"model": "live"}, paths["MODEL_PATH"])
+    monkeypatch.setattr(app_module, "model", {"model": "live"})
+    monkeypatch.setattr(app_module, "model_hash", live)
+    monkeypatch.setattr(app_module, "shadow", None)
+    monkeypatch.setattr(app_module, "_artifact_index_mtime", app_module._mtime(store.index_path))
+    return store, paths, live
+
+
+def _admin_headers():
+    with app_module.app.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity='admin-1')}"}
+
+
+def test_promote_candidate_goes_live_through_the_store(env):
+    store, paths, live = env
+    paths["CANDIDATE_PATH"].write_bytes(pickle.dumps({"model": "candidate"}))
+    paths["CANDIDATE_META_PATH"].write_text(json.dumps({"artifact_hash": "candidate"}))
+
+    resp = app_module.app.test_client().post("/api/model/shadow/promote", headers=_admin_headers())
+    assert resp.status_code == 200
+    digest = resp.get_json()["live"]
+    assert store.current() == digest and store.previous() == live
+    assert app_module.model == {"model": "candidate"} and app_module.model_hash == digest
+    assert pickle.loads(paths["MODEL_PATH"].read_bytes()) == {"model": "candidate"}
+    assert json.loads(paths["META_PATH"].read_text()) == {"artifact_hash": "candidate"}
+    assert not paths["CANDIDATE_PATH"].exists()
+    assert json.loads(paths["SHADOW_CONFIG_PATH"].read_text())["active"] is False
+
+
+def test_promote_without_candidate_is_404(env):
+    resp = app_module.app.test_client().post("/api/model/shadow/promote", headers=_admin_headers())
+    assert resp.status_code == 404
+
+
+def test_worker_sync_reloads_model_promoted_elsewhere(env):
+    store, paths, _ = env
+    other = ArtifactStore(store.root)
+    digest = other.put({"model": "rolled back elsewhere"})
+    other.promote(digest)
+    app_module.sync_worker_state()
+    assert app_module.model == {"model": "rolled back elsewhere"}
+    assert app_module.model_hash == digest
@@ -0,0 +1,157 @@
+import math
+import random
+from collections import defaultdict
+
+from datetime import datetime, timedelta
+
+from services.rollups import (
+    fold_groups, rollup_ops, rebuild_rollups, normalize_created_at, _day, _status_key,
+    SCORE_BUCKET, STATUS_IDS, ROLLUP_COLLECTION,
+)
+
+
+def _apply(store, op):
+    """Minimal in-memory $inc/$set upsert, enough to replay rollup_ops."""
+    doc = op._filter["_id"]
+    target = store.setdefault(doc, {"_id": doc})
+    for path, value in op._doc.get("$inc", {}).items():
+        node = target
+        *parents, leaf = path.split(".")
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[leaf] = node.get(leaf, 0) + value
+    target.update(op._doc.get("$set", {}))
+
+
+def _group(loans):
+    """Python stand-in for rebuild_rollups' $group stage."""
+    groups = defaultdict(lambda: {"n": 0, "amount": 0.0, "cibil": 0.0})
+    for loan in loans:
+        created = loan.get("created_at")
+        day = created[:10] if isinstance(created, str) else None
+        score = loan.get("cibil_score") or 0
+        key = (day, loan.get("status"), math.floor(score / SCORE_BUCKET) * SCORE_BUCKET)
+        g = groups[key]
+        g["n"] += 1
+        g["amount"] += loan.get("loan_amount") or 0
+        g["cibil"] += score
+    return [{"_id": {"day": d, "status": s, "bucket": b}, **v} for (d, s, b), v in groups.items()]
+
+
+def _loans(n=500):
+    rng = random.Random(3)
+    statuses = ["Approved", "Rejected", "Pending", "approved", "Weird.$status", None]
+    loans = []
+    for _ in range(n):
+        created = normalize_created_at(
+            f"2024-0{rng.randint(1, 3)}-1{rng.randint(0, 9)}T{rng.randint(0, 23):02d}:00:00Z"
+        ) if rng.random() > 0.05 else "not a date"
+        loans.append({
+            "loan_amount": float(rng.randint(1, 100) * 1000),
+            "cibil_score": float(rng.randint(300, 900)),
+            "status": rng.choice(statuses),
+            "created_at": created,
+        })
+    return loans
+
+
+def _normalize(docs):
+    return {d["_id"]: {k: (round(v, 6) if isinstance(v, float) else v) for k, v in d.items()}
+            for d in docs}
+
+
+def test_incremental_and_rebuilt_rollups_match():
+    loans = _loans()
+    store = {}
+    for loan in loans:
+        for op in rollup_ops(loan):
+            _apply(store, op)
+    rebuilt = fold_groups(_group(loans))
+    assert _normalize(store.values()) == _normalize(rebuilt)
+
+
+def test_rollup_keys_are_bounded():
+    loans = _loans()
+    ids = {op._filter["_id"] for loan in loans for op in rollup_ops(loan)}
+    status_ids = {i for i in ids if i.startswith("status:")}
+    assert status_ids <= set(STATUS_IDS)
+    assert _status_key("$where") == "Other"
+    assert _status_key(" approved ") == "Approved"
+
+
+def test_day_is_parsed_server_side():
+    assert _day("2024-02-29T23:30:00-02:00") == "2024-03-01"
+    assert _day("2024-13-45") == "unknown"
+    assert _day("../../etc") == "unknown"
+    assert normalize_created_at("2024-01-05T10:00:00+05:30") == "2024-01-05T04:30:00Z"
+    assert normalize_created_at("yesterday") is None
+
+
+class _Rollups:
+    def __init__(self, db, name):
+        self.db, self.name, self.docs = db, name, {}
+
+    def drop(self):
+        self.db.collections.pop(self.name, None)
+
+    def insert_many(self, docs):
+        self.db.collections[self.name] = self
+        for d in docs:
+            self.docs[d["_id"]] = d
+
+    def bulk_write(self, ops, ordered=True):
+        self.db.collections[self.name] = self
+        for op in ops:
+            _apply(self.docs, op)
+
+    def rename(self, new_name, dropTarget=False):
+        self.db.collections.pop(self.name)
+        self.name = new_name
+        self.db.collections[new_name] = self
+
+    def count_documents(self, query):
+        return len(self.docs)
+
+
+class _Loans:
+    def __init__(self, docs, on_aggregate=None):
+        self.docs = docs
+        self.on_aggregate = on_aggregate
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        cutoff = pipeline[0]["$match"]["$or"][1]["inserted_at"]["$lte"]
+        rows = _group([d for d in self.docs if d.get("inserted_at", cutoff) <= cutoff])
+        if self.on_aggregate:
+            self.on_aggregate()   # an API insert racing with the rebuild
+        return rows
+
+    def find(self, query):
+        cutoff = query["inserted_at"]["$gt"]
+        skip = set(query.get("_id", {}).get("$nin", []))
+        return [d for d in self.docs if d.get("inserted_at", cutoff) > cutoff and d["_id"] not in skip]
+
+
+class _DB:
+    def __init__(self, loans):
+        self.collections = {}
+        self.loans = loans
+
+    def __getitem__(self, name):
+        return self.collections.get(name) or _Rollups(self, name)
+
+
+def test_rebuild_replays_loans_inserted_while_it_runs():
+    start = datetime(2024, 4, 1, 12, 0, 0)
+    loans = _loans(100)
+    for i, loan in enumerate(loans):
+        loan["_id"] = i
+    late = dict(loans[0], _id="late", inserted_at=start + timedelta(seconds=1))
+    db = _DB(_Loans(list(loans), on_aggregate=lambda: db.loans.docs.append(late)))
+
+    rebuild_rollups(db, now=start)
+
+    expected = {}
+    for loan in loans + [late]:
+        for op in rollup_ops(loan):
+            _apply(expected, op)
+    assert _normalize(db.collections[ROLLUP_COLLECTION].docs.values()) == _normalize(expected.values())
@@ -0,0 +1,65 @@
+import time
+
+from services.shadow import ShadowEvaluator
+
+
+class Model:
+    def __init__(self, value, fail=False):
+        self.value = value
+        self.fail = fail
+
+    def predict(self, X):
+        if self.fail:
+            raise RuntimeError("broken candidate")
+        return [self.value]
+
+
+def _drain(evaluator, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while evaluator.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_canary_falls_back_to_live_when_candidate_raises():
+    ev = ShadowEvaluator(Model(0, fail=True), sample_rate=0.0, canary_percent=100)
+    assert ev.predict(Model(1), None) == 1
+    stats = ev.stats()
+    assert stats["errors"] == 1
+    assert stats["canary_served"] == 0
+    ev.close()
+
+
+def test_canary_serves_candidate_decision():
+    ev = ShadowEvaluator(Model(0), sample_rate=0.0, canary_percent=100)
+    assert ev.predict(Model(1), None) == 0
+    _drain(ev)
+    stats = ev.stats()
+    assert stats["canary_served"] == 1
+    assert stats["compared"] == 1 and stats["agreement_rate"] == 0.0
+    ev.close()
+
+
+def test_shadow_mirrors_and_counts_agreement():
+    ev = ShadowEvaluator(Model(1), sample_rate=1.0)
+    for _ in range(5):
+        assert ev.predict(Model(1), None) == 1
+    _drain(ev)
+    stats = ev.stats()
+    assert stats["compared"] == 5 and stats["agreement_rate"] == 1.0
+    assert stats["live_latency"]["count"] == 5
+    ev.close()
+
+
+def test_failing_shadow_never_affects_response():
+    ev = ShadowEvaluator(Model(0, fail=True), sample_rate=1.0)
+    assert ev.predict(Model(1), None) == 1
+    _drain(ev)
+    assert ev.stats()["errors"] == 1
+    ev.close()
+
+
+def test_backlog_is_bounded():
+    ev = ShadowEvaluator(Model(1), sample_rate=1.0, max_pending=0)
+    ev.predict(Model(1), None)
+    assert ev.stats()["dropped"] == 1
+    ev.close()
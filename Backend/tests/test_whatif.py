@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("flask_jwt_extended")
+
+import app as app_module
+
+
+class AmountModel:
+    """Stub pipeline: approves loans up to `limit` (optionally only for some terms)."""
+
+    def __init__(self, limit, terms=None):
+        self.limit = limit
+        self.terms = terms
+
+    def predict(self, df):
+        ok = df["loan_amount"].to_numpy() <= self.limit
+        if self.terms is not None:
+            ok &= np.isin(df["loan_term"].to_numpy(), self.terms)
+        return ok.astype(int)
+
+
+def _features(**overrides):
+    data = {
+        "income_annum": 10_000_000, "loan_amount": 1_000_000, "cibil_score": 800,
+        "residential_assets_value": 300_000, "commercial_assets_value": 0,
+        "luxury_assets_value": 0, "bank_asset_value": 0, "loan_term": 10,
+    }
+    data.update(overrides)
+    return app_module.applicant_features(data)
+
+
+def test_amounts_below_the_first_grid_point_are_found():
+    features = _features()
+    # Without clamping the grid would start at 20M / 40 = 500k, above every approvable amount
+    best, requested_ok, _ = app_module.whatif_search(
+        AmountModel(limit=1e12), features, [10.0], steps=40, upper=20_000_000
+    )
+    assert best[10.0] is not None
+    assert 290_000 <= best[10.0] <= 300_000
+    assert requested_ok == []
+
+
+def test_rule_cap_is_assets_or_twice_income():
+    assert app_module.rule_amount_cap(_features()) == 300_000
+    assert app_module.rule_amount_cap(_features(income_annum=100_000)) == 200_000
+
+
+def test_refinement_extends_from_the_coarse_boundary():
+    features = _features(residential_assets_value=50_000_000)
+    best, _, _ = app_module.whatif_search(
+        AmountModel(limit=1_234_567), features, [4.0, 8.0], steps=10, upper=10_000_000
+    )
+    for term in (4.0, 8.0):
+        # Coarse grid steps are 1M; refinement narrows to within one fine step
+        assert 1_000_000 < best[term] <= 1_234_567
+        assert best[term] > 1_234_567 - 1_000_000 / 11
+
+
+def test_requested_amount_column_reports_terms():
+    features = _features(residential_assets_value=50_000_000, loan_amount=2_500_000)
+    best, requested_ok, _ = app_module.whatif_search(
+        AmountModel(limit=3_000_000, terms=[6.0]), features, [2.0, 6.0], steps=7, upper=10_000_000
+    )
+    assert requested_ok == [6.0]
+    assert best[2.0] is None
+    assert best[6.0] >= 2_500_000
+
+
+def test_endpoint_clamps_to_rule_cap(monkeypatch):
+    monkeypatch.setattr(app_module, "model", AmountModel(limit=1e12))
+    resp = app_module.app.test_client().post("/api/predict/max-loan", json={
+        "income_annum": 10_000_000, "loan_amount": 1_000_000, "cibil_score": 800,
+        "residential_assets_value": 300_000, "terms": [10],
+    })
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert 290_000 <= body["max_approvable_amount"] <= 300_000
+    assert body["min_term_for_requested_amount"] is None
@@ -7,11 +7,24 @@ Run inside Backend/:  python utils/improved_train.py
 import pandas as pd
 import numpy as np
 import pickle
+import time
+import tempfile
+import tracemalloc
+import multiprocessing
+import argparse
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 import json
+import sys
 import warnings
 
+try:
+    import resource  # peak RSS; not available on Windows
+except ImportError:
+    resource = None
+
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
@@ -22,7 +35,7 @@ from sklearn.metrics import (
 )
 
 # Candidate models
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 
 try:
@@ -31,6 +44,10 @@ try:
 except ImportError:
     HAS_XGB = False
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Backend/, for `services`
+from config import Config
+from services.artifact_store import ArtifactStore
+
 warnings.filterwarnings("ignore")
 
 # -------------------
@@ -40,12 +57,36 @@ ROOT_DIR = Path(__file__).resolve().parent.parent  # Backend/
 DATA_PATH = ROOT_DIR / "data" / "loan_approval_dataset.csv"
 MODEL_OUT = ROOT_DIR / "model" / "loan_pipeline.pkl"
 META_PATH = ROOT_DIR / "model" / "loan_pipeline_meta.json"
+# --candidate: stored but not promoted; shadow it, then POST /api/model/shadow/promote
+CANDIDATE_OUT = ROOT_DIR / "model" / "loan_pipeline_candidate.pkl"
+CANDIDATE_META_PATH = ROOT_DIR / "model" / "loan_pipeline_candidate_meta.json"
+ARTIFACT_DIR = ROOT_DIR / "model" / "artifacts"
+LEGACY_BACKUP_DIR = ROOT_DIR / "model" / "backups"
 
 RANDOM_STATE = 42
 TEST_SIZE = 0.2
 N_JOBS = 1
 MODEL_CHOICE = "randomforest"  # options: "randomforest", "logreg", "xgb"
 
+# Post-training compaction: keep the smallest candidate whose validation
+# accuracy is within MAX_ACCURACY_LOSS of the full model.
+COMPACT = True
+MAX_ACCURACY_LOSS = 0.005
+COMPACT_N_ESTIMATORS = [10, 25, 50, 100]
+COMPACT_MAX_DEPTHS = [4, 6, 8, 12]
+LATENCY_SAMPLES = 200
+COMPACT_VAL_SIZE = 0.2      # share of the training split used to pick the candidate
+COMPACT_AUG_COPIES = 2      # jittered copies of the training rows labelled by the teacher
+COMPACT_AUG_NOISE = 0.1
+
+# Benchmark mode (python utils/improved_train.py --benchmark)
+BENCH_SCALES = [1, 10, 100]
+BENCH_MODELS = ["randomforest", "logreg"]
+BENCH_NOISE = 0.05  # relative jitter applied to numeric columns of resampled rows
+
+# Reference profile for the live drift monitor (services/drift_monitor.py)
+PROFILE_BINS = 10
+
 # -------------------
 # Utility functions
 # -------------------
@@ -88,15 +129,191 @@ def add_features(df):
     df["loan_to_income"] = df["loan_amount"] / (df["income_annum"] + 1)
     return df
 
+def build_reference_profile(X, y, num_cols, cat_cols, n_bins=PROFILE_BINS):
+    """Quantile-binned histograms of the training inputs plus the approval rate.
+
+    The live drift monitor reuses these bin edges so it only has to keep a
+    fixed array of counters per feature.
+    """
+    features = {}
+    for c in num_cols:
+        values = X[c].astype(float).to_numpy()
+        qs = np.quantile(values, np.linspace(0, 1, n_bins + 1))[1:-1]
+        edges = np.unique(qs)
+        counts = np.bincount(np.searchsorted(edges, values, side='right'),
+                             minlength=len(edges) + 1)
+        features[c] = {
+            "type": "numeric",
+            "edges": edges.tolist(),
+            "proportions": (counts / counts.sum()).tolist(),
+        }
+    for c in cat_cols:
+        props = X[c].astype(str).value_counts(normalize=True)
+        features[c] = {
+            "type": "categorical",
+            "proportions": {str(k): float(v) for k, v in props.items()},
+        }
+    return {
+        "n_rows": int(len(X)),
+        "approval_rate": float(np.mean(y)),
+        "features": features,
+    }
+
+# -------------------
+# Compaction
+# -------------------
+def _pickled_size(pipe):
+    return len(pickle.dumps(pipe))
+
+def _measure_latency(pipe, X, n_samples=LATENCY_SAMPLES):
+    """Median single-row predict latency in milliseconds (what /predict pays)."""
+    rows = X.iloc[:n_samples]
+    timings = []
+    for i in range(len(rows)):
+        row = rows.iloc[[i]]
+        start = time.perf_counter()
+        pipe.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000.0) if timings else None
+
+def _profile(pipe, X_test, y_test):
+    return {
+        "size_bytes": _pickled_size(pipe),
+        "latency_ms": _measure_latency(pipe, X_test),
+        "test_accuracy": float(accuracy_score(y_test, pipe.predict(X_test))),
+    }
+
+def _compaction_candidates(pipe, random_state, n_jobs):
+    """Yield (name, student_pipeline, distill) tuples to try as replacements.
+
+    Pruned forests are refit on the true labels; distilled students are fit
+    on the true labels plus teacher labels for augmented (jittered) inputs.
+    """
+    pre = pipe.named_steps['pre']
+    teacher = pipe.named_steps['model']
+
+    if isinstance(teacher, RandomForestClassifier):
+        for n in COMPACT_N_ESTIMATORS:
+            if n >= teacher.n_estimators:
+                continue
+            for depth in COMPACT_MAX_DEPTHS:
+                model = RandomForestClassifier(
+                    n_estimators=n, max_depth=depth,
+                    random_state=random_state, n_jobs=n_jobs
+                )
+                yield f"randomforest(n={n},depth={depth})", \
+                    Pipeline([('pre', clone(pre)), ('model', model)]), False
+
+    for n, depth in [(50, 2), (100, 3)]:
+        model = GradientBoostingClassifier(
+            n_estimators=n, max_depth=depth, random_state=random_state
+        )
+        yield f"distilled_gbm(n={n},depth={depth})", \
+            Pipeline([('pre', clone(pre)), ('model', model)]), True
+
+def _augment(X, random_state, copies=COMPACT_AUG_COPIES, noise=COMPACT_AUG_NOISE):
+    """Jittered copies of X (numeric columns only) for the teacher to label.
+
+    The teacher fits its training rows perfectly, so its labels there are
+    just y; distillation only transfers something on inputs it hasn't seen.
+    """
+    rng = np.random.default_rng(random_state)
+    num_cols = X.select_dtypes(include=[np.number]).columns
+    parts = []
+    for _ in range(copies):
+        Xa = X.copy()
+        for c in num_cols:
+            Xa[c] = Xa[c].to_numpy(dtype=float) * rng.normal(1.0, noise, len(Xa))
+        parts.append(Xa)
+    return pd.concat(parts, ignore_index=True)
+
+def _fit_candidate(candidate, teacher, X, y, random_state):
+    """Fit a student; distilled ones also learn the teacher's labels on augmented rows."""
+    model, distill = candidate
+    if distill:
+        X_aug = _augment(X, random_state)
+        X = pd.concat([X, X_aug], ignore_index=True)
+        y = np.concatenate([np.asarray(y), teacher.predict(X_aug)])
+    return model.fit(X, y)
+
+def compact_pipeline(pipe,
+                     X_train, y_train,
+                     X_test, y_test,
+                     max_accuracy_loss=MAX_ACCURACY_LOSS,
+                     random_state=RANDOM_STATE,
+                     n_jobs=N_JOBS,
+                     verbose=True):
+    """Shrink a fitted pipeline without losing more than max_accuracy_loss.
+
+    Candidates are chosen on a validation split carved from X_train (against
+    a reference model refit without it). The winner is refit on all of
+    X_train and must still be within max_accuracy_loss of the original on
+    the held-out X_test, or the original is served instead.
+
+    Returns (pipeline_to_serve, report). The original pipeline is returned
+    unchanged when no candidate is both smaller and accurate enough.
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=COMPACT_VAL_SIZE,
+        random_state=random_state, stratify=y_train
+    )
+    reference = clone(pipe).fit(X_fit, y_fit)
+    reference_val_acc = float(accuracy_score(y_val, reference.predict(X_val)))
+    floor = reference_val_acc - max_accuracy_loss
+    reference_size = _pickled_size(reference)
+
+    best, best_size = None, reference_size
+    tried = []
+    for name, candidate, distill in _compaction_candidates(pipe, random_state, n_jobs):
+        _fit_candidate((candidate, distill), reference, X_fit, y_fit, random_state)
+        acc = float(accuracy_score(y_val, candidate.predict(X_val)))
+        size = _pickled_size(candidate)
+        tried.append({"candidate": name, "val_accuracy": acc, "size_bytes": size})
+        if acc >= floor and size < best_size:
+            best, best_size = (name, candidate, distill), size
+
+    before = _profile(pipe, X_test, y_test)
+    test_floor = before["test_accuracy"] - max_accuracy_loss
+    rejected = None
+    chosen, served, after, distilled = None, pipe, before, False
+    if best is not None:
+        name, candidate, distill = best
+        refit = _fit_candidate((clone(candidate), distill), pipe, X_train, y_train, random_state)
+        refit_profile = _profile(refit, X_test, y_test)
+        if refit_profile["test_accuracy"] >= test_floor:
+            chosen, served, after, distilled = name, refit, refit_profile, distill
+        else:
+            # The bound is promised on held-out data for the model actually served
+            rejected = {"candidate": name, "test_accuracy": refit_profile["test_accuracy"]}
+
+    report = {
+        "max_accuracy_loss": max_accuracy_loss,
+        "selection": "validation split of the training set",
+        "reference_val_accuracy": reference_val_acc,
+        "chosen": chosen,
+        "distilled": distilled,
+        "test_accuracy_floor": test_floor,
+        "rejected_after_refit": rejected,
+        "before": before,
+        "after": after,
+        "candidates": tried,
+    }
+    if verbose:
+        print("\n--- Compaction ---")
+        print(f"chosen: {chosen or 'original (no smaller candidate met the accuracy floor)'}")
+        if rejected:
+            print(f"rejected after refit: {rejected['candidate']} "
+                  f"(test accuracy {rejected['test_accuracy']:.4f} < floor {test_floor:.4f})")
+        print(f"size: {before['size_bytes']} -> {after['size_bytes']} bytes, "
+              f"latency: {before['latency_ms']:.3f} -> {after['latency_ms']:.3f} ms, "
+              f"test accuracy: {before['test_accuracy']:.4f} -> {after['test_accuracy']:.4f}")
+    return served, report
+
 # -------------------
 # Train pipeline
 # -------------------
-def train_pipeline(df,
-                   model_out=MODEL_OUT,
-                   test_size=TEST_SIZE,
-                   random_state=RANDOM_STATE,
-                   n_jobs=N_JOBS,
-                   model_choice=MODEL_CHOICE):
+def split_features(df):
+    """Drop ids/NaNs and split into X, y and the numeric/categorical column lists."""
     if 'loan_id' in df.columns:
         df = df.drop(columns=['loan_id'])
     df = df.dropna().reset_index(drop=True)
@@ -106,7 +323,12 @@ def train_pipeline(df,
 
     cat_cols = X.select_dtypes(include=['object']).columns.tolist()
     num_cols = X.select_dtypes(include=[np.number]).columns.tolist()
+    return X, y, num_cols, cat_cols
 
+def build_pipeline(num_cols, cat_cols,
+                   model_choice=MODEL_CHOICE,
+                   random_state=RANDOM_STATE,
+                   n_jobs=N_JOBS):
     try:
         ohe = OneHotEncoder(handle_unknown='ignore', sparse=False)
     except TypeError:
@@ -131,17 +353,37 @@ def train_pipeline(df,
     else:
         raise ValueError(f"Invalid MODEL_CHOICE={model_choice}. Use randomforest/logreg/xgb")
 
-    pipe = Pipeline([
+    return Pipeline([
         ('pre', preprocessor),
         ('model', model)
     ])
 
+def train_pipeline(df,
+                   model_out=MODEL_OUT,
+                   meta_out=META_PATH,
+                   test_size=TEST_SIZE,
+                   random_state=RANDOM_STATE,
+                   n_jobs=N_JOBS,
+                   model_choice=MODEL_CHOICE,
+                   compact=COMPACT,
+                   max_accuracy_loss=MAX_ACCURACY_LOSS):
+    X, y, num_cols, cat_cols = split_features(df)
+    pipe = build_pipeline(num_cols, cat_cols, model_choice, random_state, n_jobs)
+
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=test_size, random_state=random_state, stratify=y
     )
 
     pipe.fit(X_train, y_train)
 
+    compaction = None
+    if compact:
+        pipe, compaction = compact_pipeline(
+            pipe, X_train, y_train, X_test, y_test,
+            max_accuracy_loss=max_accuracy_loss,
+            random_state=random_state, n_jobs=n_jobs
+        )
+
     results = eval_and_save_pipeline(
         pipe=pipe,
         X_train=X_train, y_train=y_train,
@@ -149,7 +391,9 @@ def train_pipeline(df,
         X_full=X, y_full=y,
         num_cols=num_cols, cat_cols=cat_cols,
         model_out=model_out,
+        meta_out=meta_out,
         n_jobs=n_jobs,
+        compaction=compaction,
         verbose=True
     )
 
@@ -164,7 +408,9 @@ def eval_and_save_pipeline(pipe,
                            X_full, y_full,
                            num_cols, cat_cols,
                            model_out=MODEL_OUT,
+                           meta_out=META_PATH,
                            n_jobs=1,
+                           compaction=None,
                            verbose=True):
 
     def _metrics(y_true, y_pred):
@@ -189,19 +435,38 @@ def eval_and_save_pipeline(pipe,
         print("\n--- TEST metrics ---")
         print(test_metrics)
 
-    try:
-        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-        cv_scores = cross_val_score(pipe, X_full, y_full, cv=cv, scoring='accuracy', n_jobs=n_jobs)
-        cv_mean = float(cv_scores.mean())
-        cv_std = float(cv_scores.std())
-    except Exception as e:
+    cv_note = None
+    if compaction and compaction.get("distilled"):
+        # cross_val_score would refit the student on true labels only, which is
+        # not how the served model was built; its score wouldn't describe it
         cv_scores, cv_mean, cv_std = None, None, None
-        print("CV failed:", e)
-
-    # Save pipeline
-    with open(model_out, 'wb') as f:
-        pickle.dump(pipe, f)
-    print("\n✅ Saved pipeline to", model_out)
+        cv_note = "skipped: distilled student (teacher labels aren't reproduced by CV refits)"
+    else:
+        try:
+            cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+            cv_scores = cross_val_score(pipe, X_full, y_full, cv=cv, scoring='accuracy', n_jobs=n_jobs)
+            cv_mean = float(cv_scores.mean())
+            cv_std = float(cv_scores.std())
+        except Exception as e:
+            cv_scores, cv_mean, cv_std = None, None, None
+            print("CV failed:", e)
+
+    # Save pipeline through the artifact store (dedup + retention); only the
+    # live path is promoted, e.g. a shadow candidate is just materialized.
+    store = ArtifactStore(ARTIFACT_DIR, keep=Config.ARTIFACT_KEEP,
+                          keep_promoted=Config.ARTIFACT_KEEP_PROMOTED)
+    store.import_legacy_backups(LEGACY_BACKUP_DIR)
+    summary = {
+        "model": type(pipe.named_steps['model']).__name__,
+        "test_accuracy": test_metrics["accuracy"],
+        "cv_mean_accuracy": cv_mean,
+    }
+    if Path(model_out) == MODEL_OUT:
+        artifact_hash = store.save(pipe, model_out, meta=summary)
+    else:
+        artifact_hash = store.put(pipe, meta=summary)
+        store.materialize(artifact_hash, model_out)
+    print("\n✅ Saved pipeline to", model_out, f"(artifact {artifact_hash[:12]})")
 
     # Save metadata
     meta = {
@@ -209,27 +474,230 @@ def eval_and_save_pipeline(pipe,
         "test_metrics": test_metrics,
         "cv_mean_accuracy": cv_mean,
         "cv_std_accuracy": cv_std,
+        "cv_note": cv_note,
         "categorical_features": cat_cols,
         "numeric_features": num_cols,
+        "compaction": compaction,
+        "reference_profile": build_reference_profile(X_full, y_full, num_cols, cat_cols),
         "saved_at": datetime.utcnow().isoformat() + "Z",
-        "model_path": str(model_out)
+        "model_path": str(model_out),
+        "artifact_hash": artifact_hash
     }
-    with open(META_PATH, "w") as f:
+    # Keep the last benchmark report; it describes training cost, not this model
+    try:
+        with open(META_PATH) as f:
+            previous = json.load(f)
+        if "benchmark" in previous:
+            meta["benchmark"] = previous["benchmark"]
+    except (OSError, ValueError):
+        pass
+    with open(meta_out, "w") as f:
         json.dump(meta, f, indent=2)
-    print(f"✅ Metadata saved to {META_PATH}")
+    print(f"✅ Metadata saved to {meta_out}")
 
     return meta
 
+# -------------------
+# Benchmark
+# -------------------
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux (bytes on macOS, which we don't deploy to)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+@contextmanager
+def _stage(stages, name, trace):
+    """Measure a block: wall time + RSS untraced, or Python peak when tracing.
+
+    Every (scale, model) run gets a fresh process, so rss_peak_mb (the
+    process high-water mark at the end of the stage) is comparable across
+    runs; rss_growth_mb is how far this stage raised it.
+    """
+    record = {}
+    if trace:
+        tracemalloc.reset_peak()
+    else:
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        if trace:
+            record["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        else:
+            record["wall_s"] = round(time.perf_counter() - start, 4)
+            rss_after = _peak_rss_mb()
+            if rss_after is not None:
+                record["rss_peak_mb"] = round(rss_after, 2)
+                record["rss_growth_mb"] = round(rss_after - rss_before, 2)
+        stages[name] = record
+
+def make_synthetic(df, scale, random_state=RANDOM_STATE, noise=BENCH_NOISE):
+    """Resample a raw (load_and_clean) frame to scale x rows with jittered numerics."""
+    rng = np.random.default_rng(random_state)
+    out = df.sample(n=len(df) * scale, replace=True, random_state=random_state)
+    out = out.reset_index(drop=True)
+    for c in out.select_dtypes(include=[np.number]).columns:
+        if c == 'loan_id':
+            continue
+        jitter = rng.normal(1.0, noise, len(out))
+        values = out[c].to_numpy() * jitter
+        out[c] = np.round(values).astype(out[c].dtype) if out[c].dtype.kind == 'i' else values
+    if 'loan_id' in out.columns:
+        out['loan_id'] = np.arange(1, len(out) + 1)
+    return out
+
+def _run_stages(path, model_choice, random_state, n_jobs, trace):
+    """One pass over load/clean/fit/CV/pickle for one model; returns (rows, stages)."""
+    stages = {}
+    with _stage(stages, "load", trace):
+        df = load_and_clean(path)
+    with _stage(stages, "clean", trace):
+        df = add_features(map_target(df, 'loan_status'))
+        X, y, num_cols, cat_cols = split_features(df)
+    del df
+
+    pipe = build_pipeline(num_cols, cat_cols, model_choice, random_state, n_jobs)
+    with _stage(stages, "fit", trace):
+        pipe.fit(X, y)
+
+    folds = []
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    for train_idx, test_idx in cv.split(X, y):
+        fold = {}
+        with _stage(fold, "fold", trace) as rec:
+            fold_pipe = clone(pipe).fit(X.iloc[train_idx], y.iloc[train_idx])
+            rec["accuracy"] = float(accuracy_score(
+                y.iloc[test_idx], fold_pipe.predict(X.iloc[test_idx])
+            ))
+        folds.append(fold["fold"])
+    stages["cv_folds"] = folds
+
+    with _stage(stages, "pickle", trace) as rec:
+        rec["size_bytes"] = len(pickle.dumps(pipe))
+    return int(len(X)), stages
+
+def _bench_run(path, model_choice, random_state, n_jobs):
+    """Untraced pass, then tracemalloc pass; runs in its own process (see benchmark_training)."""
+    rows, timed = _run_stages(path, model_choice, random_state, n_jobs, trace=False)
+    process_peak = _peak_rss_mb()
+    if process_peak is not None:
+        process_peak = round(process_peak, 2)
+    tracemalloc.start()
+    try:
+        _, traced = _run_stages(path, model_choice, random_state, n_jobs, trace=True)
+    finally:
+        tracemalloc.stop()
+    return rows, _merge_passes(timed, traced), process_peak
+
+def _merge_passes(timed, traced):
+    """Overlay the traced pass's memory numbers onto the untraced timings."""
+    merged = {}
+    for name, record in timed.items():
+        if name == "cv_folds":
+            merged[name] = [dict(t, **m) for t, m in zip(record, traced[name])]
+        else:
+            merged[name] = dict(record, **traced.get(name, {}))
+    merged["cv_total_s"] = round(sum(f["wall_s"] for f in merged["cv_folds"]), 4)
+    return merged
+
+def benchmark_training(data_path=DATA_PATH,
+                       scales=BENCH_SCALES,
+                       model_choices=BENCH_MODELS,
+                       random_state=RANDOM_STATE,
+                       n_jobs=N_JOBS,
+                       meta_path=META_PATH,
+                       verbose=True):
+    """Time and measure each training stage on the real data and scaled copies.
+
+    Each (scale, model_choice) runs in its own spawned process, twice: an
+    untraced pass for wall time and RSS, then a pass under tracemalloc for
+    per-stage Python peak memory, so the tracing hooks don't inflate the
+    timings and RSS figures are comparable between runs. Synthetic sets are written to a
+    temporary CSV so the load stage reads a file of realistic size. The
+    report is stored under "benchmark" in the metadata JSON.
+    """
+    base = load_and_clean(data_path)
+    runs = []
+    choices = [c for c in model_choices if c != "xgb" or HAS_XGB]
+    # A fresh (spawned) process per run: ru_maxrss can't be reset, so in one
+    # long process every model after the heaviest would report no growth
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = data_path
+            if scale != 1:
+                path = Path(tmp) / f"synthetic_x{scale}.csv"
+                make_synthetic(base, scale, random_state).to_csv(path, index=False)
+
+            for choice in choices:
+                with ctx.Pool(processes=1) as pool:
+                    rows, model_stages, process_peak = pool.apply(
+                        _bench_run, (str(path), choice, random_state, n_jobs)
+                    )
+                runs.append({
+                    "scale": scale,
+                    "rows": rows,
+                    "model_choice": choice,
+                    "rss_peak_mb": process_peak,
+                    "stages": model_stages,
+                })
+                if verbose:
+                    print(f"[bench] x{scale} {choice}: rows={rows} "
+                          f"fit={model_stages['fit']['wall_s']}s "
+                          f"cv={model_stages['cv_total_s']}s "
+                          f"fit_peak={model_stages['fit']['py_peak_mb']}MB "
+                          f"rss_peak={process_peak}MB")
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "data_path": str(data_path),
+        "n_jobs": n_jobs,
+        "note": ("each (scale, model_choice) runs in a fresh process. wall_s, rss_peak_mb "
+                 "(process peak RSS at the end of the stage) and rss_growth_mb come from an "
+                 "untraced pass; py_peak_mb is the per-stage Python peak from a separate "
+                 "tracemalloc pass; the run-level rss_peak_mb is the peak of the untraced pass"),
+        "runs": runs,
+    }
+
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+    meta["benchmark"] = report
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    print(f"✅ Benchmark report saved to {meta_path}")
+    return report
+
 # -------------------
 # Main
 # -------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and save the loan pipeline.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="profile training stages instead of saving a new model")
+    parser.add_argument("--scales", type=int, nargs="+", default=BENCH_SCALES)
+    parser.add_argument("--models", nargs="+", default=BENCH_MODELS)
+    parser.add_argument("--candidate", action="store_true",
+                        help="write a shadow candidate instead of replacing the live model")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_training(DATA_PATH, scales=args.scales, model_choices=args.models)
+        raise SystemExit(0)
+
     df = load_and_clean(DATA_PATH)
     df = map_target(df, 'loan_status')
     df = add_features(df)
 
     _, results = train_pipeline(
-        df, model_out=MODEL_OUT, test_size=TEST_SIZE,
+        df,
+        model_out=CANDIDATE_OUT if args.candidate else MODEL_OUT,
+        meta_out=CANDIDATE_META_PATH if args.candidate else META_PATH,
+        test_size=TEST_SIZE,
         random_state=RANDOM_STATE, n_jobs=N_JOBS, model_choice=MODEL_CHOICE
     )
 
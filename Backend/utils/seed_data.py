@@ -1,12 +1,38 @@
 """
 Seed MongoDB with default users and check dataset availability.
 Run: python utils/seed_data.py
+
+Capacity testing: generate synthetic users/loans that follow the feature
+distributions of data/loan_approval_dataset.csv.
+  python utils/seed_data.py --users 100000 --loans 2000000 --seed 7
+  python utils/seed_data.py --loans 1000000 --to-file data/synthetic.csv
 """
 
 import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
+
+import numpy as np
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
 from werkzeug.security import generate_password_hash
-from app import mongo, app
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Backend/, for `app`
+from app import mongo, app, EXPECTED_FEATURES
+from services.rollups import rebuild_rollups
+from services.etags import bump, GLOBAL_LOANS_SCOPE
+from utils.improved_train import load_and_clean
+
+DATASET_PATH = Path(__file__).resolve().parent.parent / "data" / "loan_approval_dataset.csv"
+CHUNK_SIZE = 100_000     # rows generated (and held in memory) at a time
+BATCH_SIZE = 5_000       # documents per insert_many
+WORKERS = 4              # concurrent insert_many calls
+JITTER = 0.05            # relative noise on numeric features of resampled rows
+HISTORY_DAYS = 365       # created_at spread
+SYNTHETIC_PASSWORD = "user123"
 
 def seed_users():
     """Insert a default admin and test user into MongoDB."""
@@ -36,13 +62,150 @@ def seed_users():
 
 def check_dataset():
     """Ensure loan dataset exists in /data."""
-    dataset_path = Path(__file__).resolve().parent.parent / "data" / "loan_approval_dataset.csv"
+    dataset_path = DATASET_PATH
     if dataset_path.exists():
         print(f"✅ Dataset found at: {dataset_path}")
     else:
         print(f"⚠️ Dataset missing: {dataset_path}")
 
+# ---------------------------
+# Synthetic data for capacity testing
+# ---------------------------
+def generate_applicants(n, rng, source):
+    """Yield DataFrames of up to CHUNK_SIZE applicants resampled from `source`.
+
+    Whole rows are resampled so the correlations between income, assets and
+    loan size survive; continuous features then get multiplicative jitter
+    and are clipped to the observed range. Same rng state -> same rows.
+    """
+    # Low-cardinality columns (dependents, term) keep their observed values
+    numeric = [c for c in EXPECTED_FEATURES
+               if c in source.columns and source[c].dtype.kind in "if" and source[c].nunique() > 25]
+    lo, hi = source[numeric].min(), source[numeric].max()
+    done = 0
+    while done < n:
+        size = min(CHUNK_SIZE, n - done)
+        chunk = source.iloc[rng.integers(0, len(source), size)].reset_index(drop=True)
+        for c in numeric:
+            values = chunk[c].to_numpy(dtype=float) * rng.normal(1.0, JITTER, size)
+            values = np.clip(values, lo[c], hi[c])
+            chunk[c] = np.round(values).astype(source[c].dtype) if source[c].dtype.kind == "i" else values
+        if "loan_id" in chunk.columns:
+            chunk["loan_id"] = np.arange(done + 1, done + size + 1)
+        done += size
+        yield chunk
+
+def synthetic_object_ids(n, rng):
+    """n ObjectIds from one rng draw, so re-runs with the same seed reuse the same _ids."""
+    raw = rng.bytes(12 * n)
+    return [ObjectId(raw[i:i + 12]) for i in range(0, 12 * n, 12)]
+
+def ensure_user_email_index():
+    """Unique users.email, so re-seeding can't create duplicate accounts."""
+    try:
+        mongo.db.users.create_index("email", unique=True)
+    except PyMongoError as e:
+        # Existing duplicates block the index; _id-keyed inserts still dedupe this run
+        print(f"⚠️ Could not create unique index on users.email: {e}")
+
+def _insert_batches(collection, docs, pool):
+    """insert_many in BATCH_SIZE slices on the pool; duplicates (re-runs) are skipped."""
+    def _insert(batch):
+        try:
+            return len(collection.insert_many(batch, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            return e.details.get("nInserted", 0)
+    futures = [pool.submit(_insert, docs[i:i + BATCH_SIZE]) for i in range(0, len(docs), BATCH_SIZE)]
+    return sum(f.result() for f in futures)
+
+def seed_synthetic(n_users, n_loans, seed=0, end_date=None, to_file=None, workers=WORKERS):
+    """Bulk-insert synthetic users and loans (or write loans to CSV/Parquet for training)."""
+    rng = np.random.default_rng(seed)
+    source = load_and_clean(DATASET_PATH)
+    end = end_date or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if to_file:
+        to_file = Path(to_file)
+        writer = None
+        if to_file.suffix == ".parquet":
+            import pyarrow as pa  # optional: only needed for parquet output
+            import pyarrow.parquet as pq
+        try:
+            for i, chunk in enumerate(generate_applicants(n_loans, rng, source)):
+                if to_file.suffix == ".parquet":
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(to_file, table.schema)
+                    writer.write_table(table)
+                else:
+                    chunk.to_csv(to_file, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        finally:
+            if writer is not None:
+                writer.close()
+        print(f"✅ Wrote {n_loans} synthetic applicants to {to_file}")
+        return
+
+    user_ids = synthetic_object_ids(n_users, rng)
+    password = generate_password_hash(SYNTHETIC_PASSWORD)  # hashing per user would dominate
+    with app.app_context(), ThreadPoolExecutor(max_workers=workers) as pool:
+        ensure_user_email_index()
+        # Emails are scoped by seed: same seed -> same users (skipped on re-run),
+        # different seeds -> disjoint users instead of unique-index collisions
+        users = [{
+            "_id": uid,
+            "username": f"Load Test {seed}-{i}",
+            "email": f"loadtest_s{seed}_{i}@example.com",
+            "password": password,
+            "role": "user",
+        } for i, uid in enumerate(user_ids)]
+        inserted = _insert_batches(mongo.db.users, users, pool)
+        print(f"✅ Users inserted: {inserted}/{n_users}")
+        del users
+
+        user_strs = [str(u) for u in user_ids]
+        total = 0
+        for chunk in generate_applicants(n_loans, rng, source):
+            size = len(chunk)
+            # Skewed ownership: a few users hold many loans, like real accounts
+            owners = (n_users * rng.random(size) ** 2).astype(int)
+            offsets = rng.integers(0, HISTORY_DAYS * 86400, size)
+            loan_ids = synthetic_object_ids(size, rng)
+            records = chunk.to_dict("records")
+            docs = []
+            for row, owner, offset, loan_id in zip(records, owners, offsets, loan_ids):
+                status = row.get("loan_status", "")
+                docs.append({
+                    "_id": loan_id,
+                    "user_id": user_strs[owner],
+                    "loan_amount": float(row["loan_amount"]),
+                    "income_annum": float(row["income_annum"]),
+                    "cibil_score": float(row["cibil_score"]),
+                    "status": "Approved" if "approve" in status.lower() else "Rejected",
+                    "created_at": (end - timedelta(seconds=int(offset))).isoformat() + "Z",
+                    "raw": {k: row[k] for k in EXPECTED_FEATURES if k in row},
+                })
+            total += _insert_batches(mongo.db.loans, docs, pool)
+            print(f"  … loans inserted: {total}/{n_loans}")
+        # Bulk inserts bypass /api/loan/apply, so recompute the dashboard rollups
+        rebuilt = rebuild_rollups(mongo.db)
+        bump(mongo.db, GLOBAL_LOANS_SCOPE)  # invalidate cached /api/loan/* ETags
+    print(f"✅ Loans inserted: {total}/{n_loans}; rollup documents rebuilt: {rebuilt}")
+
 if __name__ == "__main__":
-    seed_users()
-    check_dataset()
+    parser = argparse.ArgumentParser(description="Seed MongoDB (default users, or synthetic load-test data).")
+    parser.add_argument("--users", type=int, default=0, help="synthetic users to create")
+    parser.add_argument("--loans", type=int, default=0, help="synthetic loans to create")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end-date", help="latest created_at (YYYY-MM-DD); default today, fix it for reproducible runs")
+    parser.add_argument("--to-file", help="write loans to .csv/.parquet instead of Mongo")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    if args.loans or args.users:
+        end_date = datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else None
+        seed_synthetic(max(args.users, 1), args.loans, seed=args.seed, end_date=end_date,
+                       to_file=args.to_file, workers=args.workers)
+    else:
+        seed_users()
+        check_dataset()
     print("🎉 Seeding complete!")